@@ -1,25 +1,74 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, send_file, jsonify
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime, timedelta
 from pathlib import Path
-import random
-
-from models import db, User, Syllabus, Note, QuestionPaper, Quiz, QuizQuestion, QuizAttempt, Notification
-from utils import allowed_file, send_email
+import json
+import secrets
+import zipfile
+
+from models import (db, upgrade_schema, User, Syllabus, Note, QuestionPaper, Quiz, QuizQuestion,
+                    QuizAttempt, Notification, NotificationArchive, SubjectProgress)
+from utils import allowed_file, send_email, stream_zip
+from security import LoginThrottle, PasswordHasher
+from assets import init_assets, init_compression
+from progress import record_attempt
+from bundles import BUNDLE_TYPES, BundleCache, bundle_entries, invalidate_bundles
+from ingest import RESOURCE_TYPES, build_resource, ingest, zip_entries
+from variants import HTML as PDF_RENDERER, snapshot_quiz, generate_variants, variant_archive_name
+from sampling import DIFFICULTIES, parse_quotas, target_size, attempt_size, sample_questions
 from config import Config
 
 def get_available_subjects(model_class):
     """Get distinct subjects from the specified model class"""
     return [s[0] for s in db.session.query(model_class.subject).distinct().order_by(model_class.subject).all()]
 
+def visible_notifications(user):
+    """Query for unexpired notifications addressed to the given user (hot table only)"""
+    audience = [Notification.audience == "all",
+                and_(Notification.audience == "user", Notification.audience_user_id == user.id)]
+    if user.semester:
+        audience.append(and_(Notification.audience == "semester",
+                             Notification.audience_semester == user.semester))
+    return (Notification.query
+            .filter(or_(*audience))
+            .filter(or_(Notification.expires_at.is_(None), Notification.expires_at > datetime.utcnow()))
+            .order_by(Notification.pinned.desc(), Notification.created_at.desc()))
+
+def prefix_range(column, prefix):
+    """Index-friendly prefix match: prefix <= column < prefix with its last character bumped"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+def search_users(q="", semester="", page=1, per_page=20):
+    """One page of users whose name or email starts with q; returns (users, has_more)"""
+    query = User.query
+    q = q.strip().lower()
+    if q:
+        query = query.filter(or_(prefix_range(User.name_key, q), prefix_range(User.email, q)))
+    if semester:
+        query = query.filter(User.semester == semester)
+    users = (query.order_by(User.name_key, User.id)
+             .offset((page - 1) * per_page).limit(per_page + 1).all())
+    return users[:per_page], len(users) > per_page
+
 def build_app():
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(Config)
+    if app.config["TRUSTED_PROXY_COUNT"]:
+        # request.remote_addr is then the client address, not the proxy's
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXY_COUNT"])
 
     db.init_app(app)
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+
+    init_assets(app)
+    init_compression(app)
 
     login_manager = LoginManager(app)
     login_manager.login_view = "login"
@@ -29,6 +78,9 @@ def build_app():
         return User.query.get(int(user_id))
 
     upload_root = Path(app.config["UPLOAD_FOLDER"])
+    hasher = PasswordHasher(app.config["PASSWORD_HASH_METHOD"])
+    login_throttle = LoginThrottle.from_config(app.config)
+    bundle_cache = BundleCache(app.config["BUNDLE_CACHE_MIN_REQUESTS"], app.config["BUNDLE_CACHE_MAX_ENTRIES"])
 
     # ---------------- Home ----------------
     @app.route("/")
@@ -49,7 +101,7 @@ def build_app():
             if User.query.filter_by(email=email).first():
                 flash("Email already registered.", "error")
                 return redirect(url_for("register"))
-            user = User(name=name, email=email, password_hash=generate_password_hash(password),
+            user = User(name=name, email=email, password_hash=hasher.hash(password),
                         role="student", semester=semester)
             db.session.add(user)
             db.session.commit()
@@ -62,8 +114,17 @@ def build_app():
         if request.method == "POST":
             email = request.form.get("email","").strip().lower()
             password = request.form.get("password","")
+            client_ip = request.remote_addr or "unknown"
+            if not login_throttle.reserve(client_ip, email):
+                flash("Too many login attempts. Please wait a minute and try again.", "error")
+                return render_template("login.html"), 429
             user = User.query.filter_by(email=email).first()
-            if user and check_password_hash(user.password_hash, password):
+            # Unknown emails are verified against a dummy hash so they cost the same as real ones
+            if hasher.verify(user.password_hash if user else None, password):
+                login_throttle.succeeded(client_ip, email)
+                if hasher.needs_rehash(user.password_hash):
+                    user.password_hash = hasher.hash(password)
+                    db.session.commit()
                 login_user(user)
                 flash("Logged in successfully.", "success")
                 return redirect(url_for("admin_dashboard" if user.role=="admin" else "student_dashboard"))
@@ -83,20 +144,22 @@ def build_app():
     def student_dashboard():
         if current_user.role == "admin":
             return redirect(url_for("admin_dashboard"))
-        # Filter notifications visible to the student
-        notifs = Notification.query.order_by(Notification.created_at.desc()).all()
-        visible = []
-        for n in notifs:
-            if n.audience == "all":
-                visible.append(n)
-            elif n.audience == "semester" and current_user.semester and n.audience_semester == current_user.semester:
-                visible.append(n)
-            elif n.audience == "user" and n.audience_user_id == current_user.id:
-                visible.append(n)
+        # Notifications visible to the student
+        visible = visible_notifications(current_user).limit(10).all()
         attempts = (QuizAttempt.query
                     .filter_by(user_id=current_user.id)
                     .order_by(QuizAttempt.taken_at.desc()).limit(5).all())
-        return render_template("student/dashboard.html", notifications=visible[:10], attempts=attempts)
+        progress = SubjectProgress.query.filter_by(user_id=current_user.id).all()
+        return render_template("student/dashboard.html", notifications=visible, attempts=attempts,
+                               progress=progress)
+
+    @app.route("/student/progress")
+    @login_required
+    def student_progress():
+        rows = (SubjectProgress.query
+                .filter_by(user_id=current_user.id)
+                .order_by(SubjectProgress.semester, SubjectProgress.subject).all())
+        return render_template("student/progress.html", rows=rows)
 
     # ---------------- Resources (student) ----------------
     @app.route("/syllabus")
@@ -157,6 +220,35 @@ def build_app():
         folder = upload_root / sub
         return send_from_directory(folder, filename, as_attachment=True)
 
+    @app.route("/bundle")
+    @login_required
+    def download_bundle():
+        semester = request.args.get("semester", "").strip()
+        subject = request.args.get("subject", "").strip()
+        rtype = request.args.get("type", "all")
+        back = {"syllabus": "syllabus_list", "notes": "notes_list", "papers": "papers_list"}.get(rtype, "notes_list")
+        if rtype not in BUNDLE_TYPES:
+            flash("Invalid resource type", "error")
+            return redirect(url_for("index"))
+        if not semester and not subject:
+            flash("Choose a semester or subject to download.", "error")
+            return redirect(url_for(back))
+        download_name = "-".join(filter(None, (secure_filename(p) for p in (semester, subject, rtype)))) + ".zip"
+
+        cached = bundle_cache.get(semester, subject, rtype)
+        if cached:
+            return send_file(cached, as_attachment=True, download_name=download_name,
+                             mimetype="application/zip")
+        entries = bundle_entries(upload_root, semester, subject, rtype)
+        if not entries:
+            flash("No files to download for this selection.", "info")
+            return redirect(url_for(back, semester=semester, subject=subject))
+        chunks = stream_zip(entries)
+        if bundle_cache.wants(semester, subject, rtype):
+            chunks = bundle_cache.tee(chunks, semester, subject, rtype)
+        return app.response_class(chunks, mimetype="application/zip",
+                                  headers={"Content-Disposition": f'attachment; filename="{download_name}"'})
+
     # ---------------- Quizzes ----------------
     @app.route("/quizzes")
     @login_required
@@ -179,16 +271,8 @@ def build_app():
     def take_quiz(quiz_id):
         quiz = Quiz.query.get_or_404(quiz_id)
         
-        # Get questions for this quiz attempt
-        if quiz.randomize_questions and quiz.questions_per_attempt and len(quiz.questions) > quiz.questions_per_attempt:
-            # Random selection enabled and we have more questions than needed
-            selected_questions = random.sample(list(quiz.questions), quiz.questions_per_attempt)
-        else:
-            # Use all questions (either no randomization or not enough questions to select from)
-            selected_questions = list(quiz.questions)
-        
         if request.method == "POST":
-            total = len(selected_questions)
+            total = attempt_size(quiz)
             score = 0
             # We need to get the selected questions from the submitted form
             # The question IDs are embedded in the form field names
@@ -200,19 +284,29 @@ def build_app():
                         submitted_question_ids.add(int(q_id))
             
             # Score based on submitted questions only
-            for q in quiz.questions:
-                if q.id in submitted_question_ids:
-                    ans = request.form.get(f"q{q.id}")
-                    if ans and ans.upper() == q.correct_option.upper():
-                        score += 1
+            answered = []
+            if submitted_question_ids:
+                answered = (QuizQuestion.query
+                            .filter(QuizQuestion.quiz_id == quiz.id,
+                                    QuizQuestion.id.in_(submitted_question_ids))
+                            .all())
+            for q in answered:
+                ans = request.form.get(f"q{q.id}")
+                if ans and ans.upper() == q.correct_option.upper():
+                    score += 1
             
             attempt = QuizAttempt(user_id=current_user.id, quiz_id=quiz.id,
                                   score=score, total=total)
             db.session.add(attempt)
+            db.session.flush()
+            record_attempt(attempt, quiz)
             db.session.commit()
             flash(f"You scored {score}/{total}", "success")
             return redirect(url_for("quiz_result", attempt_id=attempt.id))
         
+        # Get questions for this quiz attempt (stratified draw done in the database)
+        selected_questions = sample_questions(quiz)
+        
         # Create a copy of the quiz object with selected questions for the template
         class QuizWithSelectedQuestions:
             def __init__(self, original_quiz, selected_questions):
@@ -222,8 +316,8 @@ def build_app():
                 self.subject = original_quiz.subject
                 self.questions = selected_questions
                 self.randomize_questions = original_quiz.randomize_questions
-                self.questions_per_attempt = original_quiz.questions_per_attempt
-                self.total_questions = len(original_quiz.questions)
+                self.questions_per_attempt = target_size(original_quiz)
+                self.total_questions = QuizQuestion.query.filter_by(quiz_id=original_quiz.id).count()
         
         quiz_for_template = QuizWithSelectedQuestions(quiz, selected_questions)
         return render_template("quiz/take_quiz.html", quiz=quiz_for_template)
@@ -239,15 +333,7 @@ def build_app():
     @app.route("/notifications")
     @login_required
     def notifications():
-        notifs = Notification.query.order_by(Notification.created_at.desc()).all()
-        visible = []
-        for n in notifs:
-            if n.audience == "all":
-                visible.append(n)
-            elif n.audience == "semester" and current_user.semester and n.audience_semester == current_user.semester:
-                visible.append(n)
-            elif n.audience == "user" and n.audience_user_id == current_user.id:
-                visible.append(n)
+        visible = visible_notifications(current_user).all()
         return render_template("notifications/list.html", notifications=visible)
 
     # ---------------- Admin ----------------
@@ -273,7 +359,8 @@ def build_app():
             "quizzes": Quiz.query.count()
         }
         recent = Notification.query.order_by(Notification.created_at.desc()).limit(5).all()
-        return render_template("admin/dashboard.html", stats=stats, notifications=recent)
+        return render_template("admin/dashboard.html", stats=stats, notifications=recent,
+                               hash_stats=hasher.stats())
 
     def handle_upload(subfolder):
         file = request.files.get("file")
@@ -293,16 +380,12 @@ def build_app():
         folder.mkdir(parents=True, exist_ok=True)
         file.save(folder / filename)
 
-        if subfolder == "syllabus":
-            rec = Syllabus(semester=semester, subject=subject, filename=filename)
-        elif subfolder == "notes":
-            rec = Note(semester=semester, subject=subject, title=title or filename, filename=filename)
-        elif subfolder == "papers":
-            rec = QuestionPaper(semester=semester, subject=subject, year=year or "NA", filename=filename)
-        else:
+        rec = build_resource(subfolder, filename, semester, subject, title, year)
+        if rec is None:
             return None
         db.session.add(rec)
         db.session.commit()
+        invalidate_bundles(semester, subject)
         flash("Uploaded successfully.", "success")
         return rec
 
@@ -319,6 +402,29 @@ def build_app():
                 return redirect(url_for("admin_upload", rtype=rtype))
         return render_template("admin/upload.html", rtype=rtype)
 
+    @app.route("/admin/bulk-upload", methods=["GET", "POST"])
+    @login_required
+    @admin_required
+    def admin_bulk_upload():
+        results = None
+        if request.method == "POST":
+            archive = request.files.get("archive")
+            if not archive or not archive.filename.lower().endswith(".zip"):
+                flash("Please choose a .zip archive", "error")
+                return redirect(url_for("admin_bulk_upload"))
+            defaults = {k: request.form.get(k, "").strip() for k in ["type", "semester", "subject", "year"]}
+            try:
+                results = ingest(zip_entries(archive.stream), defaults)
+            except zipfile.BadZipFile:
+                flash("The uploaded file is not a valid zip archive", "error")
+                return redirect(url_for("admin_bulk_upload"))
+            except SQLAlchemyError:
+                flash("The batch could not be saved; no files were stored.", "error")
+                return redirect(url_for("admin_bulk_upload"))
+            stored = sum(r["status"] == "stored" for r in results)
+            flash(f"Ingested {stored} of {len(results)} files.", "success" if stored else "info")
+        return render_template("admin/bulk_upload.html", results=results, rtypes=RESOURCE_TYPES)
+
     @app.route("/admin/manage/<string:rtype>")
     @login_required
     @admin_required
@@ -376,6 +482,7 @@ def build_app():
             print("Failed to delete file:", e)
         db.session.delete(rec)
         db.session.commit()
+        invalidate_bundles(rec.semester, rec.subject)
         flash("Deleted.", "info")
         return redirect(url_for("admin_manage", rtype=rtype))
 
@@ -424,13 +531,26 @@ def build_app():
                         flash("Invalid number for questions per attempt", "error")
                         return redirect(url_for("admin_quiz_create"))
             
+            # Optional per-topic/per-difficulty quotas for random selection
+            quotas = []
+            if randomize_questions:
+                try:
+                    quotas = parse_quotas(request.form.get("sampling_quotas", ""))
+                except ValueError as e:
+                    flash(str(e), "error")
+                    return redirect(url_for("admin_quiz_create"))
+                if questions_per_attempt and sum(q["count"] for q in quotas) > questions_per_attempt:
+                    flash("Quotas add up to more than the questions per attempt", "error")
+                    return redirect(url_for("admin_quiz_create"))
+            
             qz = Quiz(
                 title=title, 
                 semester=semester, 
                 subject=subject, 
                 created_by=current_user.id,
                 randomize_questions=randomize_questions,
-                questions_per_attempt=questions_per_attempt
+                questions_per_attempt=questions_per_attempt,
+                sampling_quotas=json.dumps(quotas) if quotas else None
             )
             db.session.add(qz)
             db.session.commit()
@@ -453,16 +573,48 @@ def build_app():
             question = request.form.get("question","").strip()
             options = {k: request.form.get(k,"").strip() for k in ["option_a","option_b","option_c","option_d"]}
             correct = request.form.get("correct_option","").strip().upper()
+            topic = request.form.get("topic","").strip() or None
+            difficulty = request.form.get("difficulty","medium").strip().lower()
             if not question or not all(options.values()) or correct not in {"A","B","C","D"}:
                 flash("Please fill all fields and choose correct option A/B/C/D.", "error")
                 return redirect(url_for("admin_quiz_add_question", quiz_id=quiz.id))
-            qq = QuizQuestion(quiz_id=quiz.id, question=question, correct_option=correct, **options)
+            if difficulty not in DIFFICULTIES:
+                flash("Difficulty must be easy, medium or hard.", "error")
+                return redirect(url_for("admin_quiz_add_question", quiz_id=quiz.id))
+            qq = QuizQuestion(quiz_id=quiz.id, question=question, correct_option=correct,
+                              topic=topic, difficulty=difficulty, **options)
             db.session.add(qq)
             db.session.commit()
             flash("Question added.", "success")
             return redirect(url_for("admin_quiz_add_question", quiz_id=quiz.id))
         return render_template("quiz/add_question.html", quiz=quiz)
 
+    @app.route("/admin/quiz/<int:quiz_id>/variants", methods=["GET","POST"])
+    @login_required
+    @admin_required
+    def admin_quiz_variants(quiz_id):
+        quiz = Quiz.query.get_or_404(quiz_id)
+        max_count = app.config["VARIANT_MAX_COUNT"]
+        if request.method == "POST":
+            count = request.form.get("count", type=int)
+            if not count or count <= 0 or count > max_count:
+                flash(f"Number of variants must be between 1 and {max_count}", "error")
+                return redirect(url_for("admin_quiz_variants", quiz_id=quiz.id))
+            # The raw seed picks the papers, exactly as `variants.py --seed` does
+            seed = request.form.get("seed","").strip() or secrets.token_hex(4)
+            snapshot = snapshot_quiz(quiz)
+            if not snapshot["bank"]:
+                flash("Add questions before generating variants.", "error")
+                return redirect(url_for("admin_quiz_add_question", quiz_id=quiz.id))
+            entries = generate_variants(snapshot, count, seed, workers=app.config["VARIANT_WORKERS"],
+                                        with_pdf=bool(request.form.get("pdf")))
+            return app.response_class(
+                stream_zip(entries), mimetype="application/zip",
+                headers={"Content-Disposition":
+                         f'attachment; filename="{variant_archive_name(quiz.id, seed)}"'})
+        return render_template("quiz/variants.html", quiz=quiz, max_count=max_count,
+                               pdf_available=PDF_RENDERER is not None)
+
     @app.route("/admin/quiz/<int:quiz_id>/delete", methods=["POST"])
     @login_required
     @admin_required
@@ -485,11 +637,22 @@ def build_app():
             audience = request.form.get("audience","all")
             audience_semester = request.form.get("audience_semester","").strip() or None
             audience_user_id = request.form.get("audience_user_id","").strip() or None
+            pinned = bool(request.form.get("pinned"))
+            expires_on = request.form.get("expires_on","").strip()
+            expires_at = None
+            if expires_on:
+                try:
+                    # Visible through the chosen day
+                    expires_at = datetime.strptime(expires_on, "%Y-%m-%d") + timedelta(days=1)
+                except ValueError:
+                    flash("Invalid expiry date", "error")
+                    return redirect(url_for("admin_notify"))
 
             n = Notification(
                 title=title, body=body, link=link,
                 audience=audience, audience_semester=audience_semester,
-                audience_user_id=int(audience_user_id) if audience_user_id else None
+                audience_user_id=int(audience_user_id) if audience_user_id else None,
+                expires_at=expires_at, pinned=pinned
             )
             db.session.add(n)
             db.session.commit()
@@ -511,12 +674,49 @@ def build_app():
             flash(f"Notification created. Emails sent: {sent}", "success")
             return redirect(url_for("admin_notify"))
 
-        users = User.query.order_by(User.name).all()
-        return render_template("admin/notify.html", users=users)
+        return render_template("admin/notify.html")
+
+    # ---- Users (admin)
+    @app.route("/admin/users")
+    @login_required
+    @admin_required
+    def admin_users():
+        q = request.args.get("q", "").strip()
+        semester = request.args.get("semester", "").strip()
+        page = max(request.args.get("page", 1, type=int), 1)
+        users, has_more = search_users(q, semester, page, per_page=25)
+        return render_template("admin/users.html", users=users, q=q, semester=semester,
+                               page=page, has_more=has_more)
+
+    @app.route("/admin/users/search")
+    @login_required
+    @admin_required
+    def admin_user_search():
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = min(max(request.args.get("per_page", 10, type=int), 1), 50)
+        users, has_more = search_users(request.args.get("q", ""), request.args.get("semester", "").strip(),
+                                       page, per_page)
+        return jsonify(results=[{"id": u.id, "name": u.name, "email": u.email, "semester": u.semester}
+                                for u in users],
+                       page=page, has_more=has_more)
+
+    @app.route("/admin/notifications/archive")
+    @login_required
+    @admin_required
+    def admin_notification_archive():
+        page = request.args.get("page", 1, type=int)
+        pagination = (NotificationArchive.query
+                      .order_by(NotificationArchive.archived_at.desc(), NotificationArchive.id.desc())
+                      .paginate(page=page, per_page=50, error_out=False))
+        return render_template("admin/notification_archive.html", pagination=pagination,
+                               items=pagination.items)
 
     return app
 
-app = build_app()
+# Worker processes for quiz variants are spawned and re-import this file as
+# __mp_main__ when it is run directly; they only need variants.py, not an app.
+if __name__ != "__mp_main__":
+    app = build_app()
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,134 @@
+"""
+Static asset pipeline.
+
+Stylesheets and scripts under ``static/`` are copied to ``static/dist/`` with
+a content hash in the filename (``style.3f2a9c1b04de.css``) and pre-compressed
+to ``.gz`` (and ``.br`` when the optional ``brotli`` package is installed).
+Templates reference them through ``asset_url()``, which takes the same
+filename as ``url_for('static', filename=...)``. Because a changed file gets
+a new name, the fingerprinted copies are served with immutable far-future
+cache headers.
+
+Build as part of a deploy (the app also builds on startup unless
+ASSETS_BUILD_ON_STARTUP is off):
+
+    python assets.py
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from pathlib import Path
+
+from flask import request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip variants are produced without it
+    brotli = None
+
+ASSET_EXTENSIONS = {".css", ".js", ".svg"}
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+FAR_FUTURE = 365 * 24 * 3600
+
+def _write_atomic(path, data):
+    # Several workers may build at once; never expose a half-written file
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def build_assets(static_folder):
+    """Fingerprint and pre-compress assets; returns the logical -> built name manifest"""
+    static_folder = Path(static_folder)
+    dist = static_folder / DIST_DIR
+    dist.mkdir(exist_ok=True)
+    manifest = {}
+    for src in sorted(static_folder.rglob("*")):
+        if not src.is_file() or src.suffix not in ASSET_EXTENSIONS or dist in src.parents:
+            continue
+        data = src.read_bytes()
+        logical = src.relative_to(static_folder).as_posix()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        built = f"{Path(logical).with_suffix('').as_posix()}.{digest}{src.suffix}"
+        target = dist / built
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            _write_atomic(target, data)
+            _write_atomic(target.with_name(target.name + ".gz"), gzip.compress(data, 9, mtime=0))
+            if brotli is not None:
+                _write_atomic(target.with_name(target.name + ".br"), brotli.compress(data))
+        manifest[logical] = built
+    _write_atomic(dist / MANIFEST, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+def load_manifest(static_folder):
+    path = Path(static_folder) / DIST_DIR / MANIFEST
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+def init_assets(app):
+    """Register asset_url() for templates and the /assets route for built files"""
+    static_folder = Path(app.static_folder)
+    dist = static_folder / DIST_DIR
+    if app.config.get("ASSETS_BUILD_ON_STARTUP", True):
+        manifest = build_assets(static_folder)
+    else:
+        manifest = load_manifest(static_folder)
+
+    def asset_url(filename):
+        """Fingerprinted URL for a static file, falling back to the plain static URL"""
+        built = manifest.get(filename)
+        if built is None:
+            return url_for("static", filename=filename)
+        return url_for("asset_file", filename=built)
+
+    app.jinja_env.globals["asset_url"] = asset_url
+
+    @app.route("/assets/<path:filename>")
+    def asset_file(filename):
+        encodings = request.accept_encodings
+        mimetype = None
+        headers = {}
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encodings[encoding] and (dist / (filename + suffix)).is_file():
+                # Keep the original content type; only the content encoding changes
+                mimetype = mimetypes.guess_type(filename)[0]
+                headers["Content-Encoding"] = encoding
+                filename = filename + suffix
+                break
+        response = send_from_directory(dist, filename, mimetype=mimetype, max_age=FAR_FUTURE)
+        response.headers.update(headers)
+        response.headers["Cache-Control"] = f"public, max-age={FAR_FUTURE}, immutable"
+        response.vary.add("Accept-Encoding")
+        return response
+
+    return asset_url
+
+def init_compression(app):
+    """Gzip HTML responses for clients that accept it"""
+    min_size = app.config.get("COMPRESS_MIN_SIZE", 500)
+    level = app.config.get("COMPRESS_LEVEL", 6)
+
+    @app.after_request
+    def compress_html(response):
+        if (response.mimetype != "text/html" or response.status_code != 200
+                or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or not request.accept_encodings["gzip"]):
+            return response
+        data = response.get_data()
+        response.vary.add("Accept-Encoding")
+        if len(data) < min_size:
+            return response
+        response.set_data(gzip.compress(data, level))
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+
+if __name__ == "__main__":
+    built = build_assets(Path(__file__).resolve().parent / "static")
+    for logical, name in built.items():
+        print(f"{logical} -> {DIST_DIR}/{name}")
@@ -0,0 +1,158 @@
+"""
+Zip bundles of a subject's notes, question papers and syllabi.
+
+Bundles are streamed straight from the upload store with utils.stream_zip.
+Already-compressed formats (PDF, Office XML, images, zips) are stored rather
+than deflated. Once a semester/subject/type combination has been requested
+BUNDLE_CACHE_MIN_REQUESTS times, the next download is also written to
+BUNDLE_CACHE_FOLDER while it streams. Later requests are then served from
+that file.
+
+Cached bundles live on disk, so any worker can invalidate them. Uploads and
+deletes call invalidate_bundles(semester, subject). Each invalidation also
+bumps a stamp file, so a bundle that was still being built when its files
+changed is thrown away instead of cached.
+
+Cache files are named by bundle_key(), a hash of the exact semester and
+subject strings. Names that differ only in punctuation or non-ASCII
+characters therefore never share a cached bundle. When more than
+BUNDLE_CACHE_MAX_ENTRIES bundles are cached, the least requested ones (as
+counted by this process) are evicted first.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from models import Syllabus, Note, QuestionPaper
+
+BUNDLE_MODELS = {"syllabus": Syllabus, "notes": Note, "papers": QuestionPaper}
+BUNDLE_TYPES = tuple(BUNDLE_MODELS) + ("all",)
+COMPRESSED_EXTENSIONS = {"pdf", "zip", "png", "jpg", "jpeg", "docx", "pptx"}
+MAX_TRACKED = 10000  # Distinct bundles whose request counts are remembered
+
+def bundle_key(semester, subject):
+    """Cache key for a semester/subject filter; an empty value means unfiltered"""
+    raw = json.dumps([semester or "", subject or ""])
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+def _cache_folder():
+    folder = Path(current_app.config["BUNDLE_CACHE_FOLDER"])
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+def _stamp_path(folder, key):
+    return folder / f"{key}.stamp"
+
+def _read_stamp(path):
+    try:
+        return path.read_text()
+    except FileNotFoundError:
+        return ""
+
+def bundle_entries(upload_root, semester, subject, rtype):
+    """(arcname, path, compress) zip entries for the matching resources"""
+    entries, seen = [], set()
+    for name, model in BUNDLE_MODELS.items():
+        if rtype not in (name, "all"):
+            continue
+        q = model.query
+        if semester:
+            q = q.filter_by(semester=semester)
+        if subject:
+            q = q.filter_by(subject=subject)
+        for rec in q.order_by(model.subject, model.id).all():
+            path = Path(upload_root) / name / rec.filename
+            # Subjects are free text: keep "/" or ".." in one out of the entry path
+            folder = f"{name}/" if subject else f"{name}/{secure_filename(rec.subject) or 'misc'}/"
+            arcname = folder + rec.filename
+            if arcname in seen or not path.is_file():
+                continue
+            seen.add(arcname)
+            ext = rec.filename.rsplit(".", 1)[-1].lower()
+            entries.append((arcname, path, ext not in COMPRESSED_EXTENSIONS))
+    return entries
+
+def invalidate_bundles(semester, subject):
+    """Drop cached bundles that could include files of this semester/subject"""
+    folder = _cache_folder()
+    token = uuid.uuid4().hex
+    for sem in {semester, ""}:
+        for subj in {subject, ""}:
+            key = bundle_key(sem, subj)
+            _stamp_path(folder, key).write_text(token)
+            for cached in folder.glob(f"{key}__*.zip"):
+                cached.unlink(missing_ok=True)
+
+class BundleCache:
+    """Tracks bundle popularity and keeps prebuilt zips of the most requested ones"""
+    def __init__(self, min_requests, max_entries):
+        self.min_requests = min_requests
+        self.max_entries = max_entries
+        self._requests = Counter()
+        self._lock = threading.Lock()
+
+    def _paths(self, semester, subject, rtype):
+        folder = _cache_folder()
+        key = bundle_key(semester, subject)
+        return folder / f"{key}__{rtype}.zip", _stamp_path(folder, key)
+
+    def get(self, semester, subject, rtype):
+        """Path of a prebuilt bundle, or None; either way the request counts towards popularity"""
+        with self._lock:
+            self._requests[(bundle_key(semester, subject), rtype)] += 1
+            if len(self._requests) > MAX_TRACKED:
+                # Arbitrary filter strings must not grow the counter forever
+                self._requests = Counter(dict(self._requests.most_common(MAX_TRACKED // 2)))
+        path, _ = self._paths(semester, subject, rtype)
+        return path if path.is_file() else None
+
+    def wants(self, semester, subject, rtype):
+        with self._lock:
+            return self._requests[(bundle_key(semester, subject), rtype)] >= self.min_requests
+
+    def tee(self, chunks, semester, subject, rtype):
+        """Pass zip chunks through while saving them as the cached bundle"""
+        # Resolved now: the response body is iterated after the app context is gone
+        path, stamp = self._paths(semester, subject, rtype)
+        generation = _read_stamp(stamp)
+        return self._write_through(chunks, path, stamp, generation)
+
+    def _write_through(self, chunks, path, stamp, generation):
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        complete = False
+        try:
+            with open(tmp, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            # Abandoned downloads and bundles invalidated mid-build are not kept
+            if complete and _read_stamp(stamp) == generation:
+                os.replace(tmp, path)
+                self._evict(path.parent)
+            else:
+                tmp.unlink(missing_ok=True)
+
+    def _evict(self, folder):
+        """Drop the least requested bundles (oldest first on ties) beyond max_entries"""
+        cached = []
+        with self._lock:
+            requests = dict(self._requests)
+        for path in folder.glob("*.zip"):
+            key, _, rtype = path.stem.partition("__")
+            try:
+                cached.append((requests.get((key, rtype), 0), path.stat().st_mtime, path))
+            except FileNotFoundError:  # Invalidated by another worker meanwhile
+                continue
+        cached.sort()
+        for _, _, old in cached[:max(0, len(cached) - self.max_entries)]:
+            old.unlink(missing_ok=True)
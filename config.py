@@ -17,11 +17,47 @@ class Config:
         SQLALCHEMY_DATABASE_URI = f"sqlite:///{INSTANCE_DIR / 'mca_portal.db'}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Password hashing; existing hashes are upgraded on next login when this changes
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+
+    # Login throttling (token buckets; successful logins are refunded, see security.py).
+    # The per-IP limit is sized for a whole campus sharing one NAT address.
+    LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "60"))
+    LOGIN_IP_PER_MINUTE = int(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+    LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+    LOGIN_EMAIL_PER_MINUTE = int(os.getenv("LOGIN_EMAIL_PER_MINUTE", "3"))
+    LOGIN_RATELIMIT_BACKEND = os.getenv("LOGIN_RATELIMIT_BACKEND", "")  # "module:factory" for a shared store
+    TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))  # Reverse proxies setting X-Forwarded-For
+
     UPLOAD_FOLDER = INSTANCE_DIR / "uploads"
     (UPLOAD_FOLDER / "syllabus").mkdir(parents=True, exist_ok=True)
     (UPLOAD_FOLDER / "notes").mkdir(parents=True, exist_ok=True)
     (UPLOAD_FOLDER / "papers").mkdir(parents=True, exist_ok=True)
 
+    # Weight of the newest attempt in the rolling average (see progress.py)
+    PROGRESS_EMA_ALPHA = float(os.getenv("PROGRESS_EMA_ALPHA", "0.3"))
+
+    # Printable quiz variants (see variants.py)
+    VARIANT_MAX_COUNT = int(os.getenv("VARIANT_MAX_COUNT", "500"))
+    VARIANT_WORKERS = int(os.getenv("VARIANT_WORKERS", "0")) or None  # None = one per CPU
+
+    # Static assets and response compression (see assets.py)
+    ASSETS_BUILD_ON_STARTUP = os.getenv("ASSETS_BUILD_ON_STARTUP", "true").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+
+    # Bulk ingest (see ingest.py); the pattern is matched against each file name
+    INGEST_FILENAME_PATTERN = os.getenv(
+        "INGEST_FILENAME_PATTERN",
+        r"^(?P<semester>[Ss]\d{1,2})_(?P<subject>[^_]+)(?:_(?P<year>\d{4}))?(?:_(?P<title>.+?))?\.\w+$")
+    INGEST_MAX_FILE_MB = int(os.getenv("INGEST_MAX_FILE_MB", "50"))
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "8"))
+
+    # Cached zip bundles of popular subjects (see bundles.py)
+    BUNDLE_CACHE_FOLDER = INSTANCE_DIR / "bundles"
+    BUNDLE_CACHE_MIN_REQUESTS = int(os.getenv("BUNDLE_CACHE_MIN_REQUESTS", "3"))
+    BUNDLE_CACHE_MAX_ENTRIES = int(os.getenv("BUNDLE_CACHE_MAX_ENTRIES", "20"))
+
     # Optional SMTP (used by utils.send_email)
     MAIL_SERVER = os.getenv("MAIL_SERVER", "")
     MAIL_PORT = int(os.getenv("MAIL_PORT", "587"))
@@ -29,3 +65,7 @@ class Config:
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", "")
     MAIL_USE_TLS = os.getenv("MAIL_USE_TLS", "true").lower() == "true"
     FROM_EMAIL = os.getenv("FROM_EMAIL", "no-reply@mca-portal.local")
+
+    # Notification retention (see retention.py)
+    NOTIFICATION_MAX_AGE_DAYS = int(os.getenv("NOTIFICATION_MAX_AGE_DAYS", "0"))  # 0 = only explicit expiry
+    NOTIFICATION_ARCHIVE_BATCH_SIZE = int(os.getenv("NOTIFICATION_ARCHIVE_BATCH_SIZE", "500"))
@@ -9,7 +9,7 @@ with app.app_context():
         admin = User(
             name="Administrator",
             email=email,
-            password_hash=generate_password_hash("admin123"),
+            password_hash=generate_password_hash("admin123", method=app.config["PASSWORD_HASH_METHOD"]),
             role="admin",
             semester=None
         )
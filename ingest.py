@@ -0,0 +1,243 @@
+"""
+Bulk ingest of syllabi, notes and question papers.
+
+Accepts a zip archive (admin upload) or a server-side directory (CLI). Entries
+are streamed one at a time, never extracted wholesale. Metadata comes from a
+``manifest.csv`` at the archive root when present:
+
+    file,type,semester,subject,title,year
+    S1/DBMS/unit1.pdf,notes,S1,DBMS,Unit 1 - ER Model,
+    papers/S1_DBMS_2023.pdf,papers,S1,DBMS,,2023
+
+Otherwise it is guessed from the path. A top-level ``syllabus/``, ``notes/`` or
+``papers/`` folder selects the type, and the file name is matched against
+INGEST_FILENAME_PATTERN (default ``S<n>_<subject>[_<year>][_<title>].ext``).
+Values given explicitly (the upload form, or CLI flags) override those
+guesses; only the manifest overrides the explicit values.
+
+Files are hashed and written to the upload store by a thread pool. All rows are
+then inserted in one transaction, and a per-file report is returned. Problems
+with individual files are reported per file; only a failed commit aborts the
+whole batch (and removes the files it stored).
+
+    python ingest.py PATH [--type notes] [--semester S1] [--subject DBMS] [--year 2024]
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import os
+import re
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from bundles import invalidate_bundles
+from models import db, Syllabus, Note, QuestionPaper
+from utils import allowed_file
+
+RESOURCE_TYPES = ("syllabus", "notes", "papers")
+MANIFEST_NAME = "manifest.csv"
+CHUNK_SIZE = 64 * 1024
+
+class IngestError(Exception):
+    pass
+
+def build_resource(rtype, filename, semester, subject, title="", year=""):
+    """Model instance for an uploaded file (shared with the single-file upload form)"""
+    if rtype == "syllabus":
+        return Syllabus(semester=semester, subject=subject, filename=filename)
+    if rtype == "notes":
+        return Note(semester=semester, subject=subject, title=title or filename, filename=filename)
+    if rtype == "papers":
+        return QuestionPaper(semester=semester, subject=subject, year=year or "NA", filename=filename)
+    return None
+
+# ---------------- Sources ----------------
+def zip_entries(fileobj):
+    """(path, size, opener) for each file in a zip, read lazily from the archive"""
+    archive = zipfile.ZipFile(fileobj)
+    for info in archive.infolist():
+        if not info.is_dir():
+            yield info.filename, info.file_size, (lambda info=info: archive.open(info))
+
+def directory_entries(root):
+    """(path, size, opener) for each file below a directory"""
+    root = Path(root)
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        yield path.relative_to(root).as_posix(), path.stat().st_size, (lambda path=path: open(path, "rb"))
+
+# ---------------- Metadata ----------------
+def read_manifest(entries):
+    """Manifest rows keyed by file path, or {} when the source has no manifest.csv"""
+    for path, _, opener in entries:
+        if path == MANIFEST_NAME:
+            with opener() as raw:
+                reader = csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8-sig"))
+                return {row["file"].strip(): row for row in reader if row.get("file")}
+    return {}
+
+def derive_metadata(path, manifest, pattern, defaults):
+    """Metadata for one entry: path guesses, overridden by defaults, overridden by the manifest"""
+    meta = {}
+    parts = PurePosixPath(path).parts
+    if len(parts) > 1 and parts[0].lower() in RESOURCE_TYPES:
+        meta["type"] = parts[0].lower()
+    match = pattern.match(PurePosixPath(path).name)
+    if match:
+        meta.update({k: v.replace("-", " ") if k == "title" else v
+                     for k, v in match.groupdict().items() if v})
+    meta.update({k: v for k, v in defaults.items() if v})
+    row = manifest.get(path)
+    if row:
+        meta.update({k: v.strip() for k, v in row.items() if k != "file" and v and v.strip()})
+    return meta
+
+# ---------------- Storage ----------------
+def _store(opener, staging_dir, max_bytes):
+    """Stream one entry into a staging file while hashing it; returns (temp path, sha256)"""
+    digest = hashlib.sha256()
+    tmp = staging_dir / f".ingest-{uuid.uuid4().hex}"
+    written = 0
+    try:
+        with opener() as src, open(tmp, "wb") as dst:
+            while chunk := src.read(CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise IngestError(f"larger than {max_bytes // (1024 * 1024)} MB")
+                digest.update(chunk)
+                dst.write(chunk)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return tmp, digest.hexdigest()
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _final_name(folder, filename, sha, claimed):
+    """Destination name for staged content, or None when identical content is already stored"""
+    stem, ext = os.path.splitext(filename)
+    for candidate in (filename, f"{stem}-{sha[:8]}{ext}"):
+        target = folder / candidate
+        existing = claimed.get(target) or (_file_sha256(target) if target.exists() else None)
+        if existing is None:
+            return candidate
+        if existing == sha:
+            return None
+    raise IngestError("file name collision")
+
+# ---------------- Ingest ----------------
+def ingest(entries, defaults=None, upload_root=None, workers=None):
+    """Ingest (path, size, opener) entries; returns a list of per-file result dicts"""
+    cfg = current_app.config
+    upload_root = Path(upload_root or cfg["UPLOAD_FOLDER"])
+    pattern = re.compile(cfg.get("INGEST_FILENAME_PATTERN"))
+    max_bytes = cfg.get("INGEST_MAX_FILE_MB", 50) * 1024 * 1024
+    workers = workers or cfg.get("INGEST_WORKERS", 8)
+    defaults = defaults or {}
+
+    entries = list(entries)  # (path, size, opener) tuples only; file data stays unread
+    manifest = read_manifest(entries)
+    results, planned = [], []
+    for path, size, opener in entries:
+        name = PurePosixPath(path).name
+        if path == MANIFEST_NAME or name.startswith(".") or "__MACOSX" in path:
+            continue
+        result = {"entry": path, "status": "skipped", "type": None, "filename": None, "message": ""}
+        results.append(result)
+        meta = derive_metadata(path, manifest, pattern, defaults)
+        result["type"] = meta.get("type")
+        filename = secure_filename(name)
+        if not filename or not allowed_file(filename):
+            result["message"] = "file type not allowed"
+        elif meta.get("type") not in RESOURCE_TYPES:
+            result["message"] = "unknown resource type"
+        elif not meta.get("semester") or not meta.get("subject"):
+            result["message"] = "missing semester or subject"
+        elif size > max_bytes:
+            result["message"] = f"larger than {cfg.get('INGEST_MAX_FILE_MB', 50)} MB"
+        else:
+            planned.append((result, meta, filename, opener))
+
+    for rtype in RESOURCE_TYPES:
+        (upload_root / rtype).mkdir(parents=True, exist_ok=True)
+
+    # Read, hash and write entries concurrently into staging files next to their destination
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_store, opener, upload_root / meta["type"], max_bytes)
+                   for _, meta, _, opener in planned]
+        staged = []
+        for (result, meta, filename, _), future in zip(planned, futures):
+            try:
+                staged.append((result, meta, filename, *future.result()))
+            except Exception as e:
+                result.update(status="error", message=str(e))
+
+    # Naming and database rows are decided serially; a file that cannot be placed
+    # is reported on its own and the rest of the batch carries on
+    records, moved, claimed = [], [], {}
+    for result, meta, filename, tmp, sha in staged:
+        folder = upload_root / meta["type"]
+        try:
+            final = _final_name(folder, filename, sha, claimed)
+            if final is None:
+                tmp.unlink()
+                result.update(filename=filename, message="identical file already uploaded")
+                continue
+            os.replace(tmp, folder / final)
+        except (IngestError, OSError) as e:
+            tmp.unlink(missing_ok=True)
+            result.update(status="error", filename=filename, message=str(e))
+            continue
+        claimed[folder / final] = sha
+        moved.append(folder / final)
+        records.append(build_resource(meta["type"], final, meta["semester"], meta["subject"],
+                                      meta.get("title", ""), meta.get("year", "")))
+        result.update(status="stored", filename=final, message=f"sha256 {sha[:12]}")
+
+    # Only the database commit is all-or-nothing
+    try:
+        db.session.add_all(records)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        for path in moved:
+            path.unlink(missing_ok=True)
+        raise
+    for semester, subject in {(r.semester, r.subject) for r in records}:
+        invalidate_bundles(semester, subject)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk ingest syllabi, notes and question papers")
+    parser.add_argument("path", help="zip archive or directory")
+    parser.add_argument("--type", choices=RESOURCE_TYPES)
+    parser.add_argument("--semester")
+    parser.add_argument("--subject")
+    parser.add_argument("--year")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    from app import app
+
+    defaults = {"type": args.type, "semester": args.semester, "subject": args.subject, "year": args.year}
+    with app.app_context():
+        if os.path.isdir(args.path):
+            results = ingest(directory_entries(args.path), defaults, workers=args.workers)
+        else:
+            with open(args.path, "rb") as f:
+                results = ingest(zip_entries(f), defaults, workers=args.workers)
+    for r in results:
+        print(f"{r['status']:8} {r['entry']} -> {r['type'] or '-'}/{r['filename'] or '-'} {r['message']}")
+    stored = sum(r["status"] == "stored" for r in results)
+    print(f"{stored} stored, {len(results) - stored} not stored")
@@ -1,6 +1,10 @@
 from datetime import datetime
+import json
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import validates
+from sqlalchemy.orm.attributes import set_committed_value
 
 db = SQLAlchemy()
 
@@ -12,6 +16,17 @@ class User(db.Model, UserMixin):
     role = db.Column(db.String(20), default="student")  # 'admin' or 'student'
     semester = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Lower-cased name for indexed, case-insensitive prefix search (kept in sync by validate_name)
+    name_key = db.Column(db.String(120), index=True, info={"lower_of": "name"})
+
+    __table_args__ = (
+        db.Index("ix_user_semester_name_key", "semester", "name_key"),
+    )
+
+    @validates("name")
+    def validate_name(self, key, value):
+        self.name_key = value.lower() if value else value
+        return value
 
 class Syllabus(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -46,8 +61,14 @@ class Quiz(db.Model):
     # Random question selection fields
     questions_per_attempt = db.Column(db.Integer, default=None)  # Number of questions to show per attempt (None = show all)
     randomize_questions = db.Column(db.Boolean, default=False)  # Whether to randomize question selection
+    # JSON list of {"topic", "difficulty", "count"} strata drawn per attempt (see sampling.py)
+    sampling_quotas = db.Column(db.Text)
     questions = db.relationship("QuizQuestion", backref="quiz", cascade="all, delete-orphan")
 
+    @property
+    def quotas(self):
+        return json.loads(self.sampling_quotas) if self.sampling_quotas else []
+
 class QuizQuestion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     quiz_id = db.Column(db.Integer, db.ForeignKey("quiz.id"), nullable=False)
@@ -57,6 +78,53 @@ class QuizQuestion(db.Model):
     option_c = db.Column(db.String(255), nullable=False)
     option_d = db.Column(db.String(255), nullable=False)
     correct_option = db.Column(db.String(1), nullable=False)  # 'A'/'B'/'C'/'D'
+    topic = db.Column(db.String(80))
+    difficulty = db.Column(db.String(10), default="medium")  # 'easy'|'medium'|'hard'
+    # Dense 0-based position within each sampling stratum (see RANK_STRATA), set on insert
+    rank_in_quiz = db.Column(db.Integer)
+    rank_in_topic = db.Column(db.Integer)
+    rank_in_difficulty = db.Column(db.Integer)
+    rank_in_stratum = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index("ix_quiz_question_rank", "quiz_id", "rank_in_quiz", unique=True),
+        db.Index("ix_quiz_question_topic_rank", "quiz_id", "topic", "rank_in_topic", unique=True),
+        db.Index("ix_quiz_question_difficulty_rank", "quiz_id", "difficulty", "rank_in_difficulty", unique=True),
+        db.Index("ix_quiz_question_stratum_rank", "quiz_id", "topic", "difficulty", "rank_in_stratum",
+                 unique=True),
+    )
+
+# Rank column -> columns (besides quiz_id) that define its stratum. Questions are
+# only added, or deleted together with their quiz, so ranks stay dense 0..n-1 and
+# sampling.draw() can pick uniform positions with index lookups.
+RANK_STRATA = {
+    "rank_in_quiz": (),
+    "rank_in_topic": ("topic",),
+    "rank_in_difficulty": ("difficulty",),
+    "rank_in_stratum": ("topic", "difficulty"),
+}
+
+def _next_ranks(conn, quiz_id, values):
+    """Next free rank in each stratum of a question with the given topic/difficulty"""
+    table = QuizQuestion.__table__
+    ranks = {}
+    for rank_name, keys in RANK_STRATA.items():
+        rank = table.c[rank_name]
+        q = select(rank).where(table.c.quiz_id == quiz_id, rank.isnot(None))
+        for key in keys:
+            q = q.where(table.c[key] == values[key])
+        last = conn.execute(q.order_by(rank.desc()).limit(1)).scalar()
+        ranks[rank_name] = 0 if last is None else last + 1
+    return ranks
+
+@event.listens_for(QuizQuestion, "after_insert")
+def _rank_new_question(mapper, conn, question):
+    # After the INSERT, so questions flushed together see each other's ranks
+    ranks = _next_ranks(conn, question.quiz_id, {"topic": question.topic, "difficulty": question.difficulty})
+    table = QuizQuestion.__table__
+    conn.execute(table.update().where(table.c.id == question.id).values(**ranks))
+    for name, value in ranks.items():
+        set_committed_value(question, name, value)
 
 class QuizAttempt(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -69,6 +137,28 @@ class QuizAttempt(db.Model):
     # Add this line ↓
     quiz = db.relationship("Quiz", backref="attempts")
 
+class SubjectProgress(db.Model):
+    """Materialized quiz rollup for one student, subject and semester (maintained by progress.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    semester = db.Column(db.String(20), nullable=False)
+    subject = db.Column(db.String(120), nullable=False)
+    attempts = db.Column(db.Integer, default=0)
+    total_score = db.Column(db.Integer, default=0)
+    total_questions = db.Column(db.Integer, default=0)
+    best_pct = db.Column(db.Float, default=0.0)
+    rolling_avg = db.Column(db.Float)  # Exponential moving average of attempt percentages
+    trend = db.Column(db.Float, default=0.0)  # Change in rolling_avg caused by the latest attempt
+    last_attempt_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "semester", "subject", name="uq_subject_progress"),
+    )
+
+    @property
+    def average_pct(self):
+        return self.total_score * 100.0 / self.total_questions if self.total_questions else 0.0
+
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -77,10 +167,101 @@ class Notification(db.Model):
     audience = db.Column(db.String(20), default="all")  # 'all'|'semester'|'user'
     audience_semester = db.Column(db.String(20))
     audience_user_id = db.Column(db.Integer)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Retention fields: expired rows are moved to NotificationArchive by retention.py
+    expires_at = db.Column(db.DateTime, index=True)  # None = never expires (subject to max age)
+    pinned = db.Column(db.Boolean, default=False)  # Pinned notifications are exempt from age-out, not from expires_at
+
+class NotificationArchive(db.Model):
+    """Cold storage for expired notifications; feed queries never touch this table."""
+    id = db.Column(db.Integer, primary_key=True)
+    notification_id = db.Column(db.Integer, nullable=False, index=True)  # id of the original Notification row
+    title = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    link = db.Column(db.String(255))
+    audience = db.Column(db.String(20), default="all")
+    audience_semester = db.Column(db.String(20))
+    audience_user_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, index=True)
+    expires_at = db.Column(db.DateTime)
+    pinned = db.Column(db.Boolean, default=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class NotificationRead(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, nullable=False)
     notification_id = db.Column(db.Integer, nullable=False)
     read_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Columns added after the first release. db.create_all() only creates missing
+# tables, so existing databases get these via ALTER TABLE in upgrade_schema().
+ADDED_COLUMNS = {
+    "user": ["name_key"],
+    "notification": ["expires_at", "pinned"],
+    "quiz": ["sampling_quotas"],
+    "quiz_question": ["topic", "difficulty", "rank_in_quiz", "rank_in_topic", "rank_in_difficulty",
+                      "rank_in_stratum"],
+}
+
+ADDED_INDEXES = {
+    "ix_user_name_key": ("user", ["name_key"]),
+    "ix_user_semester_name_key": ("user", ["semester", "name_key"]),
+    "ix_notification_created_at": ("notification", ["created_at"]),
+    "ix_notification_expires_at": ("notification", ["expires_at"]),
+}
+
+# Indexes of columns that are no longer used; dropped when present
+DROPPED_INDEXES = {"ix_quiz_question_rand", "ix_quiz_question_topic", "ix_quiz_question_difficulty"}
+
+def upgrade_schema():
+    """Add columns/indexes introduced after a database was first created"""
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    added = set()
+    with db.engine.begin() as conn:
+        quote = conn.dialect.identifier_preparer.quote
+        for table, columns in ADDED_COLUMNS.items():
+            if table not in tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            for name in columns:
+                if name in existing:
+                    continue
+                column = db.metadata.tables[table].c[name]
+                ddl = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(name)} {ddl}"))
+                if column.default is not None and column.default.is_scalar:
+                    conn.execute(text(f"UPDATE {quote(table)} SET {quote(name)} = :value"),
+                                 {"value": column.default.arg})
+                elif column.info.get("lower_of"):
+                    # Lower-cased search keys; str.lower() matches what the model sets on write
+                    source = quote(column.info["lower_of"])
+                    rows = conn.execute(text(f"SELECT id, {source} FROM {quote(table)}")).all()
+                    for row_id, value in rows:
+                        conn.execute(text(f"UPDATE {quote(table)} SET {quote(name)} = :value WHERE id = :id"),
+                                     {"value": value.lower() if value else value, "id": row_id})
+                added.add((table, name))
+        if ("quiz_question", "rank_in_quiz") in added:
+            _backfill_question_ranks(conn)
+        existing_indexes = {ix["name"] for t in tables for ix in inspector.get_indexes(t)}
+        for index, (table, columns) in ADDED_INDEXES.items():
+            if table in tables and index not in existing_indexes:
+                cols = ", ".join(quote(c) for c in columns)
+                conn.execute(text(f"CREATE INDEX {index} ON {quote(table)} ({cols})"))
+        if "quiz_question" in tables:
+            # The rank indexes are unique, so they are created from the model itself
+            for index in QuizQuestion.__table__.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+            for index in db.Table("quiz_question", db.MetaData(), autoload_with=conn).indexes:
+                if index.name in DROPPED_INDEXES:
+                    index.drop(conn)
+
+def _backfill_question_ranks(conn):
+    """Rank questions that predate the rank columns, in id order"""
+    table = QuizQuestion.__table__
+    unranked = conn.execute(select(table.c.id, table.c.quiz_id, table.c.topic, table.c.difficulty)
+                            .where(table.c.rank_in_quiz.is_(None)).order_by(table.c.id)).all()
+    for row_id, quiz_id, topic, difficulty in unranked:
+        ranks = _next_ranks(conn, quiz_id, {"topic": topic, "difficulty": difficulty})
+        conn.execute(table.update().where(table.c.id == row_id).values(**ranks))
@@ -0,0 +1,96 @@
+"""
+Per-student quiz progress rollups.
+
+SubjectProgress keeps one row per (student, semester, subject) with attempt
+count, best score, overall and rolling averages and a trend. take_quiz
+updates the row incrementally in the same transaction as the attempt, so the
+progress page is a single indexed read however many attempts exist.
+
+Concurrent submits for the same subject (a double-clicked first attempt,
+say) are serialized on the rollup row. The row is created under a savepoint,
+and a duplicate created by the other request is re-selected with
+SELECT ... FOR UPDATE (a no-op on SQLite, which already serializes writers),
+so neither attempt is lost.
+
+To rebuild every rollup from the attempt history (streamed, oldest first):
+
+    python progress.py
+
+Run the rebuild while quizzes are closed: it replaces all rollups with what
+it computed from the attempts it read, so attempts recorded while it runs
+are left out until the next rebuild.
+"""
+
+from flask import current_app
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Quiz, QuizAttempt, SubjectProgress
+
+def apply_attempt(row, score, total, taken_at, alpha):
+    """Fold one attempt into a rollup row"""
+    pct = score * 100.0 / total if total else 0.0
+    previous = row.rolling_avg
+    row.rolling_avg = pct if previous is None else alpha * pct + (1 - alpha) * previous
+    row.trend = 0.0 if previous is None else row.rolling_avg - previous
+    row.attempts = (row.attempts or 0) + 1
+    row.total_score = (row.total_score or 0) + score
+    row.total_questions = (row.total_questions or 0) + total
+    row.best_pct = max(row.best_pct or 0.0, pct)
+    if taken_at and (row.last_attempt_at is None or taken_at > row.last_attempt_at):
+        row.last_attempt_at = taken_at
+
+def _locked_row(key):
+    return (SubjectProgress.query.filter_by(**key)
+            .with_for_update().populate_existing().first())
+
+def record_attempt(attempt, quiz):
+    """Update the rollup for a new attempt; the caller commits"""
+    key = dict(user_id=attempt.user_id, semester=quiz.semester, subject=quiz.subject)
+    row = _locked_row(key)
+    if row is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(SubjectProgress(**key))
+        except IntegrityError:
+            pass  # A concurrent attempt created the row first; use theirs
+        row = _locked_row(key)
+    apply_attempt(row, attempt.score, attempt.total, attempt.taken_at,
+                  current_app.config.get("PROGRESS_EMA_ALPHA", 0.3))
+    return row
+
+def backfill_progress(batch_size=1000):
+    """Rebuild all rollups by streaming the attempt history; returns attempts processed.
+
+    Attempts committed after the history is read are not included (see module docs).
+    """
+    alpha = current_app.config.get("PROGRESS_EMA_ALPHA", 0.3)
+    stmt = (select(QuizAttempt.user_id, QuizAttempt.score, QuizAttempt.total, QuizAttempt.taken_at,
+                   Quiz.semester, Quiz.subject)
+            .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
+            .order_by(QuizAttempt.taken_at, QuizAttempt.id)
+            .execution_options(yield_per=batch_size))
+    rows = {}
+    processed = 0
+    for r in db.session.execute(stmt):
+        key = (r.user_id, r.semester, r.subject)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = SubjectProgress(user_id=r.user_id, semester=r.semester, subject=r.subject)
+        apply_attempt(row, r.score, r.total, r.taken_at, alpha)
+        processed += 1
+    try:
+        db.session.execute(delete(SubjectProgress))
+        db.session.add_all(rows.values())
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return processed
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        count = backfill_progress()
+        print(f"Rebuilt progress from {count} attempt(s).")
@@ -0,0 +1,71 @@
+"""
+Notification retention job.
+
+Moves expired notifications from the hot `notification` table into
+`notification_archive` in small batched transactions, so the student feed
+queries only ever scan recent, still-relevant rows.
+
+Run periodically (e.g. from cron):
+
+    python retention.py
+"""
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, delete, insert, literal, or_, select
+
+from models import db, Notification, NotificationArchive
+
+ARCHIVED_COLUMNS = ["title", "body", "link", "audience", "audience_semester",
+                    "audience_user_id", "created_at", "expires_at", "pinned"]
+
+def expired_condition(now, max_age_days):
+    """SQL condition matching notifications that should leave the hot table"""
+    # An explicit expiry applies to pinned notifications too (the feed already hides them)
+    expired = [and_(Notification.expires_at.isnot(None), Notification.expires_at <= now)]
+    if max_age_days:
+        # Opt-in: unpinned notifications without an explicit expiry age out as well
+        cutoff = now - timedelta(days=max_age_days)
+        expired.append(and_(Notification.expires_at.is_(None), Notification.pinned.isnot(True),
+                            Notification.created_at < cutoff))
+    return or_(*expired)
+
+def archive_expired_notifications(batch_size=None, max_age_days=None, now=None):
+    """Archive expired notifications one batch per transaction; returns rows moved"""
+    cfg = current_app.config
+    batch_size = batch_size or cfg.get("NOTIFICATION_ARCHIVE_BATCH_SIZE", 500)
+    if max_age_days is None:
+        max_age_days = cfg.get("NOTIFICATION_MAX_AGE_DAYS", 0)
+    now = now or datetime.utcnow()
+    condition = expired_condition(now, max_age_days)
+
+    source_cols = [Notification.id] + [getattr(Notification, c) for c in ARCHIVED_COLUMNS]
+    moved = 0
+    while True:
+        ids = db.session.execute(
+            select(Notification.id).where(condition).order_by(Notification.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        try:
+            db.session.execute(
+                insert(NotificationArchive).from_select(
+                    ["notification_id"] + ARCHIVED_COLUMNS + ["archived_at"],
+                    select(*source_cols, literal(now)).where(Notification.id.in_(ids)),
+                )
+            )
+            db.session.execute(delete(Notification).where(Notification.id.in_(ids)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        moved += len(ids)
+    return moved
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        count = archive_expired_notifications()
+        print(f"Archived {count} notification(s).")
@@ -0,0 +1,124 @@
+"""
+Stratified random question sampling.
+
+Every QuizQuestion carries a dense rank (0..n-1) within each stratum it
+belongs to: its quiz, quiz+topic, quiz+difficulty and quiz+topic+difficulty
+(see models.RANK_STRATA). A draw reads the stratum size from the highest rank
+with one index seek, picks distinct uniform positions below it, and fetches
+those rows with ``rank IN (...)``. Every question is equally likely, and
+serving k questions costs O(k log n) index work however large the bank grows.
+
+Quotas are stored on the quiz as strata such as "3 hard SQL questions" or
+"2 easy questions on any topic"; any shortfall (or any remainder up to
+``questions_per_attempt``) is drawn from the whole bank.
+"""
+
+import random
+
+from models import QuizQuestion, RANK_STRATA
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+def parse_quotas(text):
+    """Parse 'topic/difficulty = count' lines ('*' = any) into quota dicts"""
+    quotas = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if "=" not in line:
+            raise ValueError(f"Quota line {line_no}: expected 'topic/difficulty = count'")
+        stratum, count = (part.strip() for part in line.rsplit("=", 1))
+        topic, _, difficulty = stratum.partition("/")
+        topic, difficulty = topic.strip(), difficulty.strip().lower()
+        if not count.isdigit() or int(count) <= 0:
+            raise ValueError(f"Quota line {line_no}: count must be a positive number")
+        if difficulty not in ("", "*") and difficulty not in DIFFICULTIES:
+            raise ValueError(f"Quota line {line_no}: difficulty must be easy, medium or hard")
+        quotas.append({
+            "topic": None if topic in ("", "*") else topic,
+            "difficulty": None if difficulty in ("", "*") else difficulty,
+            "count": int(count),
+        })
+    return quotas
+
+def target_size(quiz):
+    """Number of questions an attempt aims for, or None to serve the whole bank"""
+    if not quiz.randomize_questions:
+        return None
+    quota_total = sum(q["count"] for q in quiz.quotas)
+    return max(quiz.questions_per_attempt or 0, quota_total) or None
+
+def attempt_size(quiz):
+    """Number of questions served per attempt, computed without loading the bank"""
+    available = QuizQuestion.query.filter_by(quiz_id=quiz.id).count()
+    target = target_size(quiz)
+    return available if target is None else min(target, available)
+
+def rank_column(topic=None, difficulty=None):
+    """Rank column numbering the stratum selected by topic/difficulty (None = any)"""
+    keys = tuple(k for k, v in (("topic", topic), ("difficulty", difficulty)) if v)
+    name = next(name for name, strata in RANK_STRATA.items() if strata == keys)
+    return getattr(QuizQuestion, name)
+
+def draw(quiz_id, count, exclude=(), topic=None, difficulty=None, rng=random):
+    """Draw up to `count` distinct questions from one stratum, uniformly at random"""
+    rank = rank_column(topic, difficulty)
+    stratum = QuizQuestion.query.filter(QuizQuestion.quiz_id == quiz_id)
+    if topic:
+        stratum = stratum.filter(QuizQuestion.topic == topic)
+    if difficulty:
+        stratum = stratum.filter(QuizQuestion.difficulty == difficulty)
+
+    last = (stratum.filter(rank.isnot(None)).with_entities(rank)
+            .order_by(rank.desc()).limit(1).scalar())
+    if last is None or count <= 0:
+        return []
+    exclude = set(exclude)
+    # A uniform random ordering of positions, long enough that skipping excluded
+    # questions still leaves `count`; its first `count` survivors are a uniform pick
+    positions = rng.sample(range(last + 1), min(last + 1, count + len(exclude)))
+    by_rank = {getattr(q, rank.key): q for q in stratum.filter(rank.in_(positions))}
+    picked = [by_rank[p] for p in positions if p in by_rank and by_rank[p].id not in exclude]
+    return picked[:count]
+
+def pick_from_bank(bank, quotas, target, rng=random):
+    """In-memory counterpart of sample_questions for an already loaded bank.
+
+    `bank` holds objects with id/topic/difficulty attributes; used where the
+    whole bank is needed anyway, e.g. generating many printable variants.
+    """
+    picked, used = [], set()
+
+    def take(count, topic=None, difficulty=None):
+        pool = [q for q in bank if q.id not in used
+                and (not topic or q.topic == topic)
+                and (not difficulty or q.difficulty == difficulty)]
+        for q in rng.sample(pool, min(count, len(pool))):
+            picked.append(q)
+            used.add(q.id)
+
+    for quota in quotas:
+        take(quota["count"], quota["topic"], quota["difficulty"])
+    if len(picked) < target:
+        take(target - len(picked))
+    rng.shuffle(picked)
+    return picked
+
+def sample_questions(quiz, rng=random):
+    """Select the questions for one attempt of `quiz`"""
+    target = target_size(quiz)
+    if target is None:
+        questions = list(quiz.questions)
+        if quiz.randomize_questions:
+            rng.shuffle(questions)
+        return questions
+
+    picked = []
+    for quota in quiz.quotas:
+        picked += draw(quiz.id, quota["count"], {q.id for q in picked},
+                       quota["topic"], quota["difficulty"], rng)
+    if len(picked) < target:
+        picked += draw(quiz.id, target - len(picked), {q.id for q in picked}, rng=rng)
+    rng.shuffle(picked)
+    return picked
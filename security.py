@@ -0,0 +1,140 @@
+"""
+Login protection helpers: token-bucket throttling and password hashing.
+
+The throttle keeps one bucket per client IP and one per email address. The
+default backend is process-local; set LOGIN_RATELIMIT_BACKEND to a
+"module:factory" import path to share buckets between workers. A backend
+needs ``consume(key, capacity, refill_per_sec, cost=1)``, which atomically
+takes tokens and returns True when there were enough, and
+``refund(key, capacity, refill_per_sec, cost=1)``, which gives them back.
+
+Every attempt reserves a token before the password hash is checked, so a
+parallel burst can never run more hashes than the buckets allow. Successful
+logins are refunded, which means many students signing in correctly from
+one shared campus address are never throttled. Behind a reverse proxy, set
+TRUSTED_PROXY_COUNT so the per-IP bucket sees the real client address.
+"""
+
+import secrets
+import threading
+import time
+
+from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.utils import import_string
+
+class MemoryBucketBackend:
+    """In-process token buckets, guarded by a lock"""
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, last_update, capacity, refill_per_sec)
+        self._lock = threading.Lock()
+
+    def _tokens(self, key, capacity, refill_per_sec, now):
+        tokens, updated, _, _ = self._buckets.get(key, (capacity, now, capacity, refill_per_sec))
+        return min(capacity, tokens + (now - updated) * refill_per_sec)
+
+
+    def consume(self, key, capacity, refill_per_sec, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._tokens(key, capacity, refill_per_sec, now)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now, capacity, refill_per_sec)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return allowed
+
+    def refund(self, key, capacity, refill_per_sec, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens = min(capacity, self._tokens(key, capacity, refill_per_sec, now) + cost)
+            self._buckets[key] = (tokens, now, capacity, refill_per_sec)
+
+    def _prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        for key, (tokens, updated, capacity, rate) in list(self._buckets.items()):
+            if tokens + (now - updated) * rate >= capacity:
+                del self._buckets[key]
+        if len(self._buckets) > self.max_keys:
+            # Still too many active keys (e.g. a spray of random emails): drop the stalest half
+            stale = sorted(self._buckets, key=lambda k: self._buckets[k][1])
+            for key in stale[:len(stale) // 2]:
+                del self._buckets[key]
+
+class LoginThrottle:
+    """Per-IP and per-email token buckets for login attempts"""
+    def __init__(self, backend, ip_burst, ip_per_minute, email_burst, email_per_minute):
+        self.backend = backend
+        self.ip_limit = (ip_burst, ip_per_minute / 60.0)
+        self.email_limit = (email_burst, email_per_minute / 60.0)
+
+    @classmethod
+    def from_config(cls, cfg):
+        backend_path = cfg.get("LOGIN_RATELIMIT_BACKEND")
+        backend = import_string(backend_path)() if backend_path else MemoryBucketBackend()
+        return cls(backend,
+                   cfg.get("LOGIN_IP_BURST", 60), cfg.get("LOGIN_IP_PER_MINUTE", 30),
+                   cfg.get("LOGIN_EMAIL_BURST", 5), cfg.get("LOGIN_EMAIL_PER_MINUTE", 3))
+
+    def reserve(self, ip, email):
+        """Take one attempt from both buckets before verifying; False means throttled"""
+        if not self.backend.consume(f"login:ip:{ip}", *self.ip_limit):
+            return False
+        if email and not self.backend.consume(f"login:email:{email}", *self.email_limit):
+            self.backend.refund(f"login:ip:{ip}", *self.ip_limit)
+            return False
+        return True
+
+    def succeeded(self, ip, email):
+        """Give back the attempt reserved for a login that verified"""
+        self.backend.refund(f"login:ip:{ip}", *self.ip_limit)
+        if email:
+            self.backend.refund(f"login:email:{email}", *self.email_limit)
+
+class PasswordHasher:
+    """Wraps werkzeug hashing with constant-cost misses, rehash detection and timing stats"""
+    def __init__(self, method):
+        self.method = method
+        # Verified against on unknown emails so misses cost the same as hits
+        self._dummy_hash = generate_password_hash(secrets.token_hex(16), method=method)
+        self.prefix = self._dummy_hash.split("$", 1)[0]  # e.g. "scrypt:32768:8:1"
+        self._lock = threading.Lock()
+        self._count = 0
+        self._seconds = 0.0
+
+    def _record(self, started):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._count += 1
+            self._seconds += elapsed
+
+    def hash(self, password):
+        started = time.perf_counter()
+        try:
+            return generate_password_hash(password, method=self.method)
+        finally:
+            self._record(started)
+
+    def verify(self, stored_hash, password):
+        """Check a password; pass stored_hash=None for unknown users"""
+        started = time.perf_counter()
+        try:
+            ok = check_password_hash(stored_hash or self._dummy_hash, password)
+            return ok and stored_hash is not None
+        finally:
+            self._record(started)
+
+    def needs_rehash(self, stored_hash):
+        """True when the stored hash was made with different parameters than configured"""
+        return stored_hash.split("$", 1)[0] != self.prefix
+
+    def stats(self):
+        with self._lock:
+            count, seconds = self._count, self._seconds
+        return {
+            "count": count,
+            "total_seconds": round(seconds, 3),
+            "avg_ms": round(seconds * 1000 / count, 1) if count else 0.0,
+        }
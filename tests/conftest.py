@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the module-level app in app.py at a scratch database before config is imported
+_scratch = tempfile.mkdtemp(prefix="mca-portal-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch}/import.db"
+
+from config import Config  # noqa: E402
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """A fresh portal app with its own database, upload store and bundle cache"""
+    from app import build_app
+
+    uploads = tmp_path / "uploads"
+    for rtype in ("syllabus", "notes", "papers"):
+        (uploads / rtype).mkdir(parents=True)
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(Config, "UPLOAD_FOLDER", uploads)
+    monkeypatch.setattr(Config, "BUNDLE_CACHE_FOLDER", tmp_path / "bundles")
+    monkeypatch.setattr(Config, "PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")  # Keep hashing cheap
+    app = build_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        yield app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
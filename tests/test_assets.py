@@ -0,0 +1,38 @@
+import gzip
+import re
+
+from assets import build_assets
+
+def test_build_fingerprints_and_precompresses(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "site.css").write_text("body { color: red; }")
+    (tmp_path / "logo.png").write_bytes(b"png")
+
+    manifest = build_assets(tmp_path)
+    built = manifest["css/site.css"]
+    assert re.fullmatch(r"css/site\.[0-9a-f]{12}\.css", built)
+    assert "logo.png" not in manifest
+    assert gzip.decompress((tmp_path / "dist" / (built + ".gz")).read_bytes()) == b"body { color: red; }"
+
+    (tmp_path / "css" / "site.css").write_text("body { color: blue; }")
+    assert build_assets(tmp_path)["css/site.css"] != built
+
+def test_fingerprinted_asset_is_immutable_and_encoded(client):
+    page = client.get("/login")
+    url = re.search(rb'href="(/assets/style\.[0-9a-f]{12}\.css)"', page.data).group(1).decode()
+
+    plain = client.get(url)
+    assert plain.status_code == 200 and plain.mimetype == "text/css"
+    assert "immutable" in plain.headers["Cache-Control"]
+    assert "Content-Encoding" not in plain.headers
+
+    zipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip" and zipped.mimetype == "text/css"
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    assert gzip.decompress(zipped.data) == plain.data
+
+def test_html_is_gzipped_for_clients_that_accept_it(client):
+    response = client.get("/login", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"<html" in gzip.decompress(response.data).lower()
+    assert "Content-Encoding" not in client.get("/login").headers
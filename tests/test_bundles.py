@@ -0,0 +1,92 @@
+import io
+import zipfile
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from bundles import BundleCache, bundle_entries, bundle_key, invalidate_bundles
+from models import db, Note, QuestionPaper, User
+
+@pytest.fixture
+def logged_in(app, client):
+    for email, role in (("admin@example.com", "admin"), ("student@example.com", "student")):
+        db.session.add(User(name=role, email=email, role=role, semester="S1",
+                            password_hash=generate_password_hash("secret", method="pbkdf2:sha256:1000")))
+    db.session.commit()
+    client.post("/login", data={"email": "student@example.com", "password": "secret"})
+    return client
+
+def add_note(app, subject, filename, data=b"notes", semester="S1"):
+    (app.config["UPLOAD_FOLDER"] / "notes" / filename).write_bytes(data)
+    note = Note(semester=semester, subject=subject, title=filename, filename=filename)
+    db.session.add(note)
+    db.session.commit()
+    return note
+
+def test_keys_keep_distinct_filters_apart():
+    assert bundle_key("S1", "C++ Programming") != bundle_key("S1", "C Programming")
+    assert bundle_key("", "डेटा") != bundle_key("", "")
+    assert bundle_key("S1", "") != bundle_key("", "S1")
+
+def test_entry_names_stay_inside_the_archive(app):
+    add_note(app, "../../etc", "a.txt")
+    add_note(app, "C++/Systems", "b.txt")
+    add_note(app, "..", "c.txt")
+    names = [arcname for arcname, _, _ in bundle_entries(app.config["UPLOAD_FOLDER"], "S1", "", "notes")]
+    assert sorted(names) == ["notes/C_Systems/b.txt", "notes/etc/a.txt", "notes/misc/c.txt"]
+
+def test_bundle_download_is_a_valid_zip(app, logged_in):
+    add_note(app, "DBMS", "unit1.txt", b"normalisation " * 100)
+    (app.config["UPLOAD_FOLDER"] / "papers" / "2023.pdf").write_bytes(b"%PDF-1.4 paper")
+    db.session.add(QuestionPaper(semester="S1", subject="DBMS", year="2023", filename="2023.pdf"))
+    db.session.commit()
+
+    response = logged_in.get("/bundle?semester=S1&subject=DBMS&type=all")
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    assert archive.testzip() is None
+    info = {i.filename: i for i in archive.infolist()}
+    assert info["notes/unit1.txt"].compress_type == zipfile.ZIP_DEFLATED
+    assert info["papers/2023.pdf"].compress_type == zipfile.ZIP_STORED
+    assert archive.read("papers/2023.pdf") == b"%PDF-1.4 paper"
+
+def test_popular_bundle_is_cached_until_an_upload_invalidates_it(app, logged_in):
+    add_note(app, "DBMS", "unit1.txt", b"v1")
+    cache_dir = app.config["BUNDLE_CACHE_FOLDER"]
+    url = "/bundle?semester=S1&subject=DBMS&type=notes"
+    for _ in range(app.config["BUNDLE_CACHE_MIN_REQUESTS"]):
+        logged_in.get(url).get_data()
+    assert len(list(cache_dir.glob("*.zip"))) == 1
+
+    admin = app.test_client()
+    admin.post("/login", data={"email": "admin@example.com", "password": "secret"})
+    admin.post("/admin/upload/notes", data={"semester": "S1", "subject": "DBMS", "title": "Unit 2",
+                                            "file": (io.BytesIO(b"v2"), "unit2.txt")})
+    assert not list(cache_dir.glob("*.zip"))
+    names = zipfile.ZipFile(io.BytesIO(logged_in.get(url).data)).namelist()
+    assert names == ["notes/unit1.txt", "notes/unit2.txt"]
+
+def test_invalidation_covers_unfiltered_bundles_but_not_other_subjects(app):
+    cache = BundleCache(min_requests=0, max_entries=10)
+    for semester, subject in (("S1", "DBMS"), ("S1", ""), ("", "DBMS"), ("S1", "OS")):
+        list(cache.tee(iter([b"zip"]), semester, subject, "all"))
+    invalidate_bundles("S1", "DBMS")
+    assert cache.get("S1", "OS", "all") is not None
+    assert all(cache.get(s, subj, "all") is None for s, subj in (("S1", "DBMS"), ("S1", ""), ("", "DBMS")))
+
+def test_bundle_invalidated_mid_build_is_not_kept(app):
+    cache = BundleCache(min_requests=0, max_entries=10)
+    chunks = cache.tee(iter([b"part1", b"part2"]), "S1", "DBMS", "all")
+    next(chunks)
+    invalidate_bundles("S1", "DBMS")
+    list(chunks)
+    assert cache.get("S1", "DBMS", "all") is None
+
+def test_eviction_keeps_the_most_requested_bundles(app):
+    cache = BundleCache(min_requests=0, max_entries=2)
+    for subject, requests in (("popular", 5), ("rare", 1), ("medium", 3)):
+        for _ in range(requests):
+            cache.get("S1", subject, "all")
+        list(cache.tee(iter([b"zip"]), "S1", subject, "all"))
+    assert cache.get("S1", "rare", "all") is None
+    assert cache.get("S1", "popular", "all") is not None
+    assert cache.get("S1", "medium", "all") is not None
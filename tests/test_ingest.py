@@ -0,0 +1,99 @@
+import hashlib
+import io
+import re
+import zipfile
+
+import pytest
+
+import ingest as ingest_module
+from config import Config
+from ingest import derive_metadata, directory_entries, ingest, zip_entries
+from models import db, Note, QuestionPaper, Syllabus
+
+PATTERN = re.compile(Config.INGEST_FILENAME_PATTERN)
+
+def make_zip(files):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+def by_entry(results):
+    return {r["entry"]: r for r in results}
+
+def test_filename_pattern_only_guesses_semester_tokens():
+    assert derive_metadata("papers/S1_DBMS_2023.pdf", {}, PATTERN, {}) == {
+        "type": "papers", "semester": "S1", "subject": "DBMS", "year": "2023"}
+    assert derive_metadata("notes/ER_diagram.pdf", {}, PATTERN, {}) == {"type": "notes"}
+    assert "semester" not in derive_metadata("MCA_Regular_First_Semester_Syllabus_final_1-min_7.pdf",
+                                             {}, PATTERN, {})
+
+def test_explicit_values_beat_filename_guesses_and_manifest_beats_both():
+    defaults = {"type": "", "semester": "S3", "subject": "OS", "year": ""}
+    assert derive_metadata("notes/S1_DBMS_Unit-1.pdf", {}, PATTERN, defaults) == {
+        "type": "notes", "semester": "S3", "subject": "OS", "title": "Unit 1"}
+    manifest = {"notes/S1_DBMS_Unit-1.pdf": {"file": "notes/S1_DBMS_Unit-1.pdf", "subject": "DBMS ", "year": ""}}
+    assert derive_metadata("notes/S1_DBMS_Unit-1.pdf", manifest, PATTERN, defaults)["subject"] == "DBMS"
+
+def test_form_values_are_stored(app):
+    archive = make_zip({"notes/ER_diagram.pdf": b"er", "syllabus/S1_DBMS.pdf": b"syl"})
+    results = by_entry(ingest(zip_entries(archive), {"semester": "S3", "subject": "OS"}))
+    assert {r["status"] for r in results.values()} == {"stored"}
+    note = Note.query.one()
+    assert (note.semester, note.subject, note.filename) == ("S3", "OS", "ER_diagram.pdf")
+    assert (Syllabus.query.one().semester, Syllabus.query.one().subject) == ("S3", "OS")
+
+def test_report_covers_skips_duplicates_and_manifest(app):
+    manifest = "file,type,semester,subject,title,year\nq.pdf,papers,S2,CN,,2024\n"
+    archive = make_zip({"manifest.csv": manifest, "q.pdf": b"paper", "notes/S1_DBMS_a.pdf": b"a",
+                        "notes/S1_DBMS_copy.pdf": b"a", "notes/readme.exe": b"x", "misc/S1_DBMS.pdf": b"m"})
+    results = by_entry(ingest(zip_entries(archive)))
+    assert results["q.pdf"]["status"] == "stored"
+    assert (QuestionPaper.query.one().subject, QuestionPaper.query.one().year) == ("CN", "2024")
+    assert results["notes/S1_DBMS_a.pdf"]["status"] == "stored"
+    assert results["notes/S1_DBMS_copy.pdf"]["status"] == "stored"  # Same bytes, different name
+    assert results["notes/readme.exe"]["message"] == "file type not allowed"
+    assert results["misc/S1_DBMS.pdf"]["message"] == "unknown resource type"
+
+    again = by_entry(ingest(zip_entries(make_zip({"notes/S1_DBMS_a.pdf": b"a"}))))
+    assert again["notes/S1_DBMS_a.pdf"]["message"] == "identical file already uploaded"
+    assert Note.query.count() == 2
+
+def test_placement_failures_are_reported_per_file(app, tmp_path, monkeypatch):
+    notes = app.config["UPLOAD_FOLDER"] / "notes"
+    (notes / "S1_DBMS_a.pdf").write_bytes(b"other")
+    source = tmp_path / "src" / "notes"
+    source.mkdir(parents=True)
+    for name, data in {"S1_DBMS_a.pdf": b"new", "S1_DBMS_b.pdf": b"b", "S1_DBMS_c.pdf": b"c"}.items():
+        (source / name).write_bytes(data)
+    # The collision fallback name is taken by different content as well
+    sha = hashlib.sha256(b"new").hexdigest()
+    (notes / f"S1_DBMS_a-{sha[:8]}.pdf").write_bytes(b"third")
+
+    real_replace = ingest_module.os.replace
+
+    def failing_replace(src, dst):
+        if str(dst).endswith("_c.pdf"):
+            raise OSError("disk full")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(ingest_module.os, "replace", failing_replace)
+    results = by_entry(ingest(directory_entries(tmp_path / "src")))
+
+    assert results["notes/S1_DBMS_a.pdf"]["status"] == "error"
+    assert results["notes/S1_DBMS_a.pdf"]["message"] == "file name collision"
+    assert results["notes/S1_DBMS_c.pdf"]["message"] == "disk full"
+    assert results["notes/S1_DBMS_b.pdf"]["status"] == "stored"
+    assert [n.filename for n in Note.query] == ["S1_DBMS_b.pdf"]
+    assert not list(notes.glob(".ingest-*"))
+
+def test_failed_commit_removes_stored_files(app, monkeypatch):
+    def broken_commit():
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(db.session, "commit", broken_commit)
+    with pytest.raises(RuntimeError):
+        ingest(zip_entries(make_zip({"notes/S1_DBMS_a.pdf": b"a"})))
+    assert not list((app.config["UPLOAD_FOLDER"] / "notes").iterdir())
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import progress
+from models import db, User, Quiz, QuizAttempt, QuizQuestion, SubjectProgress
+from progress import apply_attempt, backfill_progress, record_attempt
+
+@pytest.fixture
+def student(app):
+    user = User(name="Student", email="student@example.com", role="student", semester="S1",
+                password_hash=generate_password_hash("secret", method="pbkdf2:sha256:1000"))
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def quiz(app):
+    quiz = Quiz(title="DBMS basics", semester="S1", subject="DBMS")
+    db.session.add(quiz)
+    db.session.flush()
+    for i in range(4):
+        db.session.add(QuizQuestion(quiz_id=quiz.id, question=f"Q{i}", option_a="a", option_b="b",
+                                    option_c="c", option_d="d", correct_option="A"))
+    db.session.commit()
+    return quiz
+
+def test_apply_attempt_arithmetic():
+    row = SubjectProgress(user_id=1, semester="S1", subject="DBMS")
+    start = datetime(2026, 3, 1)
+    for day, (score, total) in enumerate([(5, 10), (10, 10), (0, 10)]):
+        apply_attempt(row, score, total, start + timedelta(days=day), alpha=0.5)
+    assert row.attempts == 3 and row.total_score == 15 and row.total_questions == 30
+    assert row.average_pct == pytest.approx(50.0)
+    assert row.best_pct == pytest.approx(100.0)
+    assert row.rolling_avg == pytest.approx(37.5)  # 50 -> 75 -> 37.5
+    assert row.trend == pytest.approx(-37.5)
+    assert row.last_attempt_at == start + timedelta(days=2)
+
+def test_submitting_a_quiz_updates_the_rollup(app, client, student, quiz):
+    client.post("/login", data={"email": student.email, "password": "secret"})
+    first = QuizQuestion.query.filter_by(quiz_id=quiz.id).first()
+    for answer in ("A", "B"):
+        assert client.post(f"/quiz/{quiz.id}", data={f"q{first.id}": answer}).status_code == 302
+
+    row = SubjectProgress.query.filter_by(user_id=student.id, subject="DBMS").one()
+    assert row.attempts == 2 and row.total_score == 1 and row.total_questions == 8
+    assert b"DBMS" in client.get("/student/progress").data
+
+def test_concurrently_created_row_is_reused(app, student, quiz, monkeypatch):
+    db.session.add(SubjectProgress(user_id=student.id, semester="S1", subject="DBMS", attempts=1,
+                                   total_score=2, total_questions=4, best_pct=50.0, rolling_avg=50.0))
+    db.session.commit()
+    # Simulate the other request committing the row after this one looked for it
+    real = progress._locked_row
+    lookups = []
+
+    def stale_first_lookup(key):
+        lookups.append(key)
+        return real(key) if len(lookups) > 1 else None
+
+    monkeypatch.setattr(progress, "_locked_row", stale_first_lookup)
+
+    attempt = QuizAttempt(user_id=student.id, quiz_id=quiz.id, score=4, total=4)
+    db.session.add(attempt)
+    db.session.flush()
+    record_attempt(attempt, quiz)
+    db.session.commit()
+
+    row = SubjectProgress.query.filter_by(user_id=student.id).one()
+    assert row.attempts == 2 and row.total_score == 6 and row.total_questions == 8
+    assert QuizAttempt.query.count() == 1
+
+def test_backfill_matches_incremental_rollups(app, student, quiz):
+    other = Quiz(title="OS", semester="S1", subject="OS")
+    db.session.add(other)
+    db.session.flush()
+    start = datetime(2026, 3, 1)
+    for i, (q, score) in enumerate([(quiz, 1), (other, 3), (quiz, 4), (quiz, 2)]):
+        attempt = QuizAttempt(user_id=student.id, quiz_id=q.id, score=score, total=4,
+                              taken_at=start + timedelta(hours=i))
+        db.session.add(attempt)
+        db.session.flush()
+        record_attempt(attempt, q)
+    db.session.commit()
+    columns = ("subject", "attempts", "total_score", "total_questions", "best_pct", "rolling_avg", "trend")
+    snapshot = lambda: sorted(tuple(getattr(r, c) for c in columns) for r in SubjectProgress.query)
+    incremental = snapshot()
+
+    assert backfill_progress(batch_size=2) == 4
+    assert snapshot() == incremental
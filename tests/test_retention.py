@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from models import db, Notification, NotificationArchive
+from retention import archive_expired_notifications
+
+NOW = datetime(2026, 6, 1)
+
+def add(title, expires_at=None, pinned=False, age_days=1):
+    db.session.add(Notification(title=title, body="b", audience="all", pinned=pinned,
+                                expires_at=expires_at, created_at=NOW - timedelta(days=age_days)))
+
+def remaining():
+    return sorted(n.title for n in Notification.query)
+
+def test_only_explicit_expiry_by_default(app):
+    add("expired", expires_at=NOW - timedelta(hours=1))
+    add("expired pinned", expires_at=NOW - timedelta(hours=1), pinned=True)
+    add("future", expires_at=NOW + timedelta(days=1))
+    add("old", age_days=400)
+    db.session.commit()
+
+    assert archive_expired_notifications(batch_size=1, now=NOW) == 2
+    assert remaining() == ["future", "old"]
+    archived = NotificationArchive.query.order_by(NotificationArchive.notification_id).all()
+    assert [a.title for a in archived] == ["expired", "expired pinned"]
+    assert all(a.archived_at == NOW for a in archived)
+
+def test_age_out_is_opt_in_and_skips_pinned(app):
+    add("old", age_days=400)
+    add("old pinned", age_days=400, pinned=True)
+    add("recent", age_days=10)
+    db.session.commit()
+
+    assert archive_expired_notifications(max_age_days=180, now=NOW) == 1
+    assert remaining() == ["old pinned", "recent"]
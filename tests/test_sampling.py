@@ -0,0 +1,103 @@
+import random
+from collections import Counter
+
+import pytest
+from sqlalchemy import insert
+
+from models import db, Quiz, QuizQuestion, RANK_STRATA
+from sampling import draw, sample_questions
+
+def make_quiz(**kwargs):
+    quiz = Quiz(title="Sampling", semester="S1", subject="DBMS", randomize_questions=True, **kwargs)
+    db.session.add(quiz)
+    db.session.flush()
+    return quiz
+
+def question(quiz, i, topic=None, difficulty="medium"):
+    return QuizQuestion(quiz_id=quiz.id, question=f"Q{i}", option_a="a", option_b="b", option_c="c",
+                        option_d="d", correct_option="A", topic=topic, difficulty=difficulty)
+
+@pytest.fixture
+def quiz(app):
+    quiz = make_quiz(questions_per_attempt=1)
+    for i in range(10):
+        db.session.add(question(quiz, i, topic="SQL" if i % 2 else "ER"))
+        db.session.commit()
+    return quiz
+
+def test_ranks_are_dense_per_stratum(app):
+    quiz = make_quiz()
+    specs = [("SQL", "easy"), ("SQL", "hard"), (None, "easy"), ("ER", "easy"), ("SQL", "easy")]
+    db.session.add_all(question(quiz, i, t, d) for i, (t, d) in enumerate(specs))  # One flush
+    db.session.commit()
+    db.session.add(question(quiz, 5, "SQL", "hard"))
+    db.session.commit()
+
+    rows = QuizQuestion.query.filter_by(quiz_id=quiz.id).all()
+    for rank_name, keys in RANK_STRATA.items():
+        groups = {}
+        for q in rows:
+            groups.setdefault(tuple(getattr(q, k) for k in keys), []).append(getattr(q, rank_name))
+        for ranks in groups.values():
+            assert sorted(ranks) == list(range(len(ranks))), rank_name
+
+def test_draw_is_uniform(quiz):
+    rng = random.Random(2026)
+    draws = 5000
+    counts = Counter(q.id for _ in range(draws) for q in draw(quiz.id, 1, rng=rng))
+    assert len(counts) == 10
+    expected = draws / 10  # Binomial sd is about 21, so these bounds are roughly +-5 sd
+    assert all(expected - 110 < c < expected + 110 for c in counts.values()), counts
+
+def test_draw_is_uniform_around_exclusions(quiz):
+    excluded = {q.id for q in QuizQuestion.query.filter_by(quiz_id=quiz.id).limit(4)}
+    rng = random.Random(5)
+    counts = Counter(q.id for _ in range(3000) for q in draw(quiz.id, 2, excluded, rng=rng))
+    assert len(counts) == 6 and not excluded & set(counts)
+    assert all(1000 - 130 < c < 1000 + 130 for c in counts.values()), counts
+
+def test_draw_respects_stratum_and_exclusions(quiz):
+    sql = [q.id for q in QuizQuestion.query.filter_by(topic="SQL")]
+    picked = draw(quiz.id, 10, exclude=sql[:2], topic="SQL", rng=random.Random(1))
+    assert sorted(q.id for q in picked) == sorted(sql[2:])
+
+def test_sample_questions_fills_quotas(quiz):
+    quiz.questions_per_attempt = 4
+    quiz.sampling_quotas = '[{"topic": "SQL", "difficulty": null, "count": 3}]'
+    picked = sample_questions(quiz, random.Random(7))
+    assert len(picked) == 4 == len({q.id for q in picked})
+    assert sum(q.topic == "SQL" for q in picked) >= 3
+
+def draw_cost(size):
+    """SQLite VM steps (in units of 10) spent drawing from a bank of `size` questions"""
+    quiz = make_quiz()
+    topics, difficulties = ("SQL", "ER"), ("easy", "medium", "hard")
+    counters, rows = Counter(), []
+    for i in range(size):
+        topic, difficulty = topics[i % 2], difficulties[i % 3]
+        ranks = {}
+        for rank_name, keys in RANK_STRATA.items():
+            key = (rank_name,) + tuple({"topic": topic, "difficulty": difficulty}[k] for k in keys)
+            ranks[rank_name] = counters[key]
+            counters[key] += 1
+        rows.append(dict(quiz_id=quiz.id, question=f"Q{i}", option_a="a", option_b="b", option_c="c",
+                         option_d="d", correct_option="A", topic=topic, difficulty=difficulty, **ranks))
+    db.session.execute(insert(QuizQuestion), rows)  # Bulk insert with precomputed ranks
+    db.session.commit()
+
+    raw = db.session.connection().connection.dbapi_connection
+    steps = []
+    raw.set_progress_handler(lambda: steps.append(1) and 0, 10)
+    try:
+        rng = random.Random(3)
+        for topic in (None, "SQL"):
+            assert len(draw(quiz.id, 10, topic=topic, difficulty="hard", rng=rng)) == 10
+            assert len(draw(quiz.id, 10, topic=topic, rng=rng)) == 10
+    finally:
+        raw.set_progress_handler(None, 10)
+    return len(steps)
+
+def test_draw_cost_does_not_grow_with_bank_size(app):
+    small, large = draw_cost(1_000), draw_cost(60_000)
+    # Index lookups grow with log(n) only; a scan or OFFSET walk would be ~60x
+    assert large < small * 1.5, (small, large)
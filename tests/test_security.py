@@ -0,0 +1,67 @@
+import threading
+
+from werkzeug.security import generate_password_hash
+
+from models import db, User
+from security import LoginThrottle, MemoryBucketBackend, PasswordHasher
+
+def make_user(email="student@example.com", password="secret", method="pbkdf2:sha256:1000"):
+    user = User(name="Student", email=email, role="student", semester="S1",
+                password_hash=generate_password_hash(password, method=method))
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def login(client, email, password, ip="10.0.0.1"):
+    return client.post("/login", data={"email": email, "password": password},
+                       environ_base={"REMOTE_ADDR": ip})
+
+def test_failed_logins_are_throttled_per_email(app, client):
+    make_user()
+    burst = app.config["LOGIN_EMAIL_BURST"]
+    statuses = [login(client, "student@example.com", "wrong", ip=f"10.0.0.{i}").status_code
+                for i in range(burst + 2)]
+    assert statuses == [200] * burst + [429, 429]
+
+def test_successful_logins_share_an_address_without_throttling(app):
+    for i in range(app.config["LOGIN_IP_BURST"] + 5):
+        make_user(email=f"s{i}@example.com")
+        assert login(app.test_client(), f"s{i}@example.com", "secret").status_code == 302
+
+def test_reservations_bound_concurrent_attempts():
+    throttle = LoginThrottle(MemoryBucketBackend(), 100, 1, 5, 1)
+    granted = []
+    barrier = threading.Barrier(20)
+
+    def attempt():
+        barrier.wait()
+        granted.append(throttle.reserve("10.0.0.1", "victim@example.com"))
+
+    threads = [threading.Thread(target=attempt) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert granted.count(True) == 5
+
+def test_email_rejection_refunds_the_ip_bucket():
+    throttle = LoginThrottle(MemoryBucketBackend(), 2, 0, 1, 0)
+    assert throttle.reserve("10.0.0.1", "a@example.com")
+    assert not throttle.reserve("10.0.0.1", "a@example.com")
+    assert throttle.reserve("10.0.0.1", "b@example.com")  # The rejected attempt cost the IP nothing
+
+def test_unknown_email_still_runs_a_hash(app, client):
+    hasher = PasswordHasher("pbkdf2:sha256:1000")
+    assert not hasher.verify(None, "anything")
+    assert hasher.stats()["count"] == 1
+
+    response = login(client, "nobody@example.com", "secret")
+    assert response.status_code == 200
+    assert b"Invalid credentials" in response.data
+
+def test_outdated_hash_is_upgraded_on_login(app, client):
+    user = make_user(method="pbkdf2:sha256:500")
+    assert login(client, user.email, "secret").status_code == 302
+    db.session.refresh(user)
+    assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+    assert login(app.test_client(), user.email, "secret").status_code == 302
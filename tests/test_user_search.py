@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from app import prefix_range, search_users
+from models import db, User
+
+@pytest.fixture
+def users(app):
+    people = [("Anita Rao", "anita@example.com", "S1"), ("anand kumar", "kumar@example.com", "S2"),
+              ("Bhavna", "an.bhavna@example.com", "S1"), ("Zoe", "zoe@example.com", "S1")]
+    for name, email, semester in people:
+        db.session.add(User(name=name, email=email, semester=semester, role="student",
+                            password_hash=generate_password_hash("secret", method="pbkdf2:sha256:1000")))
+    db.session.add(User(name="Admin", email="admin@example.com", role="admin",
+                        password_hash=generate_password_hash("secret", method="pbkdf2:sha256:1000")))
+    db.session.commit()
+
+def names(result):
+    return [u.name for u in result[0]]
+
+def test_prefix_matches_name_or_email_case_insensitively(users):
+    assert names(search_users("AN")) == ["anand kumar", "Anita Rao", "Bhavna"]
+    assert names(search_users("an", semester="S1")) == ["Anita Rao", "Bhavna"]
+    assert names(search_users("kum")) == ["anand kumar"]
+    assert names(search_users("rao")) == []  # Prefix search, not substring
+
+def test_pagination_reports_more_pages(users):
+    first, more = search_users("", page=1, per_page=2)
+    second, more_after = search_users("", page=3, per_page=2)
+    assert len(first) == 2 and more
+    assert len(second) == 1 and not more_after
+
+def test_name_key_follows_name_changes(users):
+    user = User.query.filter_by(email="zoe@example.com").one()
+    user.name = "Anwesha"
+    db.session.commit()
+    assert "Anwesha" in names(search_users("anw"))
+
+def test_prefix_search_uses_indexes(users):
+    query = User.query.filter(prefix_range(User.name_key, "an") | prefix_range(User.email, "an"))
+    sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    plan = [row[-1] for row in db.session.execute(text("EXPLAIN QUERY PLAN " + sql))]
+    assert not any(step.startswith("SCAN") for step in plan), plan
+    assert any("USING INDEX ix_user_name_key" in step for step in plan), plan
+    assert any("USING INDEX ix_user_email" in step for step in plan), plan
+
+def test_search_endpoint_is_admin_only(app, client, users):
+    client.post("/login", data={"email": "anita@example.com", "password": "secret"})
+    assert client.get("/admin/users/search?q=an").status_code in (302, 403)
+
+    admin = app.test_client()
+    admin.post("/login", data={"email": "admin@example.com", "password": "secret"})
+    data = admin.get("/admin/users/search?q=an&per_page=2").get_json()
+    assert [r["name"] for r in data["results"]] == ["anand kumar", "Anita Rao"]
+    assert data["has_more"] is True
@@ -0,0 +1,63 @@
+import io
+import zipfile
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Quiz, QuizQuestion
+from utils import stream_zip
+from variants import (build_variant, generate_variants, snapshot_quiz, variant_archive_name,
+                      variant_seed)
+
+@pytest.fixture
+def quiz(app):
+    quiz = Quiz(title="Midterm", semester="S1", subject="DBMS", randomize_questions=True,
+                questions_per_attempt=4)
+    db.session.add(quiz)
+    db.session.flush()
+    for i in range(10):
+        db.session.add(QuizQuestion(quiz_id=quiz.id, question=f"Question {i}", option_a=f"right {i}",
+                                    option_b="wrong b", option_c="wrong c", option_d="wrong d",
+                                    correct_option="A"))
+    db.session.commit()
+    return quiz
+
+def unzip(chunks):
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    return {name: archive.read(name) for name in archive.namelist()}
+
+def test_stream_zip_builds_a_valid_archive(tmp_path):
+    big = tmp_path / "notes.pdf"
+    big.write_bytes(bytes(range(256)) * 2000)  # Spans several read chunks
+    files = unzip(stream_zip([("a.txt", b"hello", True), ("docs/notes.pdf", big, False)], chunk_size=1024))
+    assert files == {"a.txt": b"hello", "docs/notes.pdf": big.read_bytes()}
+
+def test_variants_are_reproducible_and_answer_keys_follow_the_shuffle(quiz):
+    snapshot = snapshot_quiz(quiz)
+    first = build_variant(snapshot, "Midterm 2026", 7)
+    assert first == build_variant(snapshot, "Midterm 2026", 7)
+    assert first != build_variant(snapshot, "Midterm_2026", 7)
+    assert len(first) == 4
+    for q in first:
+        assert dict(q["options"])[q["answer"]].startswith("right")
+
+def test_seed_is_used_raw_and_only_the_file_name_is_sanitized():
+    assert variant_seed(3, "Midterm 2026", 1) == "3:Midterm 2026:1"
+    assert variant_archive_name(3, "Midterm 2026/../x") == "quiz-3-variants-Midterm_2026_.._x.zip"
+    assert variant_archive_name(3, "परीक्षा") == "quiz-3-variants-batch.zip"
+
+def test_admin_download_matches_the_cli_batch(app, client, quiz):
+    db.session.add(User(name="Admin", email="admin@example.com", role="admin",
+                        password_hash=generate_password_hash("secret", method="pbkdf2:sha256:1000")))
+    db.session.commit()
+    client.post("/login", data={"email": "admin@example.com", "password": "secret"})
+    response = client.post(f"/admin/quiz/{quiz.id}/variants", data={"count": "3", "seed": "Midterm 2026"})
+    assert response.status_code == 200
+    assert f'filename="quiz-{quiz.id}-variants-Midterm_2026.zip"' in response.headers["Content-Disposition"]
+
+    web = unzip(response.response)
+    cli = unzip(stream_zip(generate_variants(snapshot_quiz(quiz), 3, "Midterm 2026", workers=2)))
+    papers = [name for name in web if name.endswith((".html", ".csv"))]
+    assert len(papers) == 7  # 3 papers, 3 keys, answer-keys.csv
+    assert all(web[name] == cli[name] for name in papers)
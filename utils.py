@@ -1,4 +1,7 @@
+import io
 import smtplib
+import time
+import zipfile
 from email.message import EmailMessage
 from flask import current_app
 
@@ -30,4 +33,55 @@ def send_email(to_email, subject, body):
     except Exception as e:
         print("Email send failed:", e)
         return False
-    
\ No newline at end of file
+    
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands written bytes back to the zip generator"""
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_zip(entries, chunk_size=64 * 1024):
+    """Yield a zip archive piece by piece without temp files or whole-archive buffering.
+
+    `entries` yields (arcname, source, compress) tuples where source is either
+    bytes or a filesystem path; compress=False stores the entry as-is (for
+    already-compressed files such as PDFs).
+    """
+    sink = _ZipStreamBuffer()
+    with zipfile.ZipFile(sink, "w") as zf:
+        for arcname, source, compress in entries:
+            compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            if isinstance(source, bytes):
+                info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+                info.compress_type = compress_type
+                zf.writestr(info, source)
+            else:
+                info = zipfile.ZipInfo.from_file(source, arcname)
+                info.compress_type = compress_type
+                with open(source, "rb") as src, zf.open(info, "w") as dst:
+                    while chunk := src.read(chunk_size):
+                        dst.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
@@ -0,0 +1,170 @@
+"""
+Printable randomized quiz variants for offline exams.
+
+Each variant is seeded from (quiz id, batch seed, variant number), so any
+paper can be regenerated exactly later. The question bank is loaded once and
+handed to a process pool. Workers pick questions (honouring the quiz's
+topic/difficulty quotas), shuffle the option order, and render the paper and
+its answer key to HTML, plus PDF when WeasyPrint is installed. Results are
+streamed straight into a zip archive.
+
+Workers are started with the "spawn" method and re-import the launching
+script, so a script that starts the pool must not build the Flask app at
+import time outside an ``if __name__ == "__main__"`` guard (app.py skips it
+in workers).
+
+    python variants.py QUIZ_ID --count 200 --seed midterm-2026 [--pdf] [--workers 4] [-o out.zip]
+"""
+
+import argparse
+import csv
+import io
+import multiprocessing
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from werkzeug.utils import secure_filename
+
+from sampling import pick_from_bank, target_size
+from utils import stream_zip
+
+try:
+    from weasyprint import HTML
+except ImportError:  # Optional: HTML-only output without it
+    HTML = None
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+LETTERS = "ABCD"
+
+BankQuestion = namedtuple("BankQuestion", "id question options correct_option topic difficulty")
+
+def snapshot_quiz(quiz):
+    """Plain, picklable copy of a quiz and its question bank for worker processes"""
+    bank = [BankQuestion(q.id, q.question, (q.option_a, q.option_b, q.option_c, q.option_d),
+                         q.correct_option.upper(), q.topic, q.difficulty)
+            for q in quiz.questions]
+    return {
+        "id": quiz.id,
+        "title": quiz.title,
+        "semester": quiz.semester,
+        "subject": quiz.subject,
+        "quotas": quiz.quotas,
+        "target": target_size(quiz) or len(bank),
+        "bank": bank,
+    }
+
+def variant_seed(quiz_id, batch_seed, number):
+    return f"{quiz_id}:{batch_seed}:{number}"
+
+def variant_archive_name(quiz_id, batch_seed):
+    """Download file name for a batch; the seed itself is used unmodified for the papers"""
+    return f"quiz-{quiz_id}-variants-{secure_filename(batch_seed) or 'batch'}.zip"
+
+def build_variant(quiz, batch_seed, number):
+    """Questions for one variant with shuffled options and remapped answers"""
+    rng = random.Random(variant_seed(quiz["id"], batch_seed, number))
+    questions = []
+    for q in pick_from_bank(quiz["bank"], quiz["quotas"], quiz["target"], rng):
+        order = list(range(len(LETTERS)))
+        rng.shuffle(order)
+        questions.append({
+            "id": q.id,
+            "question": q.question,
+            "options": [(LETTERS[pos], q.options[i]) for pos, i in enumerate(order)],
+            "answer": LETTERS[order.index(LETTERS.index(q.correct_option))],
+        })
+    return questions
+
+# Per-worker state, set once by the pool initializer instead of pickled per job
+_quiz = None
+_env = None
+
+def _init_worker(quiz):
+    global _quiz, _env
+    _quiz = quiz
+    _env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(["html"]))
+
+def render_variant(job):
+    number, batch_seed, with_pdf = job
+    questions = build_variant(_quiz, batch_seed, number)
+    template = _env.get_template("quiz/print_variant.html")
+    context = dict(quiz=_quiz, number=number, seed=batch_seed, questions=questions)
+    paper = template.render(answer_key=False, **context)
+    key = template.render(answer_key=True, **context)
+    pdf = HTML(string=paper).write_pdf() if with_pdf and HTML is not None else None
+    return number, paper, key, pdf, tuple((q["id"], q["answer"]) for q in questions)
+
+def generate_variants(snapshot, count, batch_seed, workers=None, with_pdf=False, stats=None):
+    """Yield zip entries (see utils.stream_zip) for `count` variants, their keys and a report"""
+    stats = {} if stats is None else stats
+    started = time.perf_counter()
+    keys = io.StringIO()
+    writer = csv.writer(keys)
+    writer.writerow(["variant", "question_no", "question_id", "answer"])
+    seen, duplicates = set(), 0
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(snapshot,))
+    try:
+        jobs = [(n, batch_seed, with_pdf) for n in range(1, count + 1)]
+        chunksize = max(1, count // ((workers or multiprocessing.cpu_count()) * 4))
+        for number, paper, key, pdf, answers in pool.map(render_variant, jobs, chunksize=chunksize):
+            name = f"variant-{number:03d}"
+            yield f"{name}.html", paper.encode(), True
+            yield f"keys/{name}-key.html", key.encode(), True
+            if pdf:
+                yield f"pdf/{name}.pdf", pdf, False
+            for question_no, (question_id, answer) in enumerate(answers, 1):
+                writer.writerow([number, question_no, question_id, answer])
+            if answers in seen:
+                duplicates += 1
+            seen.add(answers)
+    finally:
+        # Also reached when a download is aborted: drop the queued work
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    stats.update(variants=count, seconds=round(elapsed, 2),
+                 per_second=round(count / elapsed, 1) if elapsed else float(count),
+                 duplicates=duplicates, pdf=bool(with_pdf and HTML is not None))
+    yield "answer-keys.csv", keys.getvalue().encode(), True
+    report = [f"Quiz: {snapshot['title']} (id {snapshot['id']})",
+              f"Batch seed: {batch_seed}",
+              f"Questions per variant: {min(snapshot['target'], len(snapshot['bank']))} of {len(snapshot['bank'])}",
+              f"Variants: {count} ({duplicates} duplicate selections)",
+              f"PDF: {'yes' if stats['pdf'] else 'no'}",
+              f"Generated in {stats['seconds']}s ({stats['per_second']} variants/s)"]
+    yield "REPORT.txt", ("\n".join(report) + "\n").encode(), True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate printable randomized quiz variants")
+    parser.add_argument("quiz_id", type=int)
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", default="default")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--pdf", action="store_true", help="also render PDFs (needs WeasyPrint)")
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    from app import app
+    from models import Quiz
+
+    with app.app_context():
+        quiz = Quiz.query.get(args.quiz_id)
+        if quiz is None:
+            raise SystemExit(f"Quiz {args.quiz_id} not found")
+        snapshot = snapshot_quiz(quiz)
+    if args.pdf and HTML is None:
+        print("WeasyPrint is not installed; generating HTML only.")
+    output = args.output or variant_archive_name(args.quiz_id, args.seed)
+    stats = {}
+    with open(output, "wb") as out:
+        entries = generate_variants(snapshot, args.count, args.seed, args.workers, args.pdf, stats)
+        for chunk in stream_zip(entries):
+            out.write(chunk)
+    print(f"Wrote {stats['variants']} variants to {output} in {stats['seconds']}s "
+          f"({stats['per_second']} variants/s, {stats['duplicates']} duplicates)")